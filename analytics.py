@@ -0,0 +1,179 @@
+"""
+Fleet-wide analytics over the saved-session archive.
+
+Streams every saved session (JSON Lines segments and older per-session JSON
+files) through a generator pipeline, splits large segments into byte-range
+chunks analyzed in parallel by a process pool, and merges the small partial
+aggregates into a report: per-item error rates, the categories kids confuse
+most, and level progression. Memory stays constant as the archive grows.
+
+Usage:
+    python analytics.py --data-dir data --workers 8 --output analytics_report.json
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from session_store import SESSION_DIR, session_files, read_session_file
+
+CHUNK_BYTES = 64 * 1024 * 1024     # Size of the byte ranges JSON Lines segments are split into
+MIN_ITEM_ATTEMPTS = 20              # Items with fewer attempts are left out of error-rate rankings
+
+class SessionStats:
+    """Mergeable aggregates over a stream of saved sessions"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.events = 0
+        self.item_attempts = Counter()      # (item, category) -> placements
+        self.item_errors = Counter()        # (item, category) -> wrong placements
+        self.confusions = Counter()         # (category, basket) -> wrong placements
+        self.level_sessions = Counter()     # level -> sessions that played it
+        self.level_attempts = Counter()     # level -> placements
+        self.level_correct = Counter()      # level -> correct placements
+        self.highest_levels = Counter()     # highest level reached -> sessions
+
+    def add_session(self, record):
+        history = record.get("game_history", [])
+        self.sessions += 1
+        self.events += len(history)
+        levels = set()
+        for move in history:
+            level = move["level"]
+            key = (move["item"]["name"], move["item"]["type"])
+            levels.add(level)
+            self.item_attempts[key] += 1
+            self.level_attempts[level] += 1
+            if move["is_correct"]:
+                self.level_correct[level] += 1
+            else:
+                self.item_errors[key] += 1
+                self.confusions[(move["item"]["type"], move["basket"])] += 1
+        self.level_sessions.update(levels)
+        self.highest_levels[record.get("highest_level", max(levels, default=1))] += 1
+
+    def merge(self, other):
+        self.sessions += other.sessions
+        self.events += other.events
+        for name in ("item_attempts", "item_errors", "confusions", "level_sessions",
+                     "level_attempts", "level_correct", "highest_levels"):
+            getattr(self, name).update(getattr(other, name))
+        return self
+
+    def report(self, top=20, min_item_attempts=MIN_ITEM_ATTEMPTS):
+        """Aggregated report as plain JSON-serializable data"""
+        items = [{
+            "item": name,
+            "category": category,
+            "attempts": attempts,
+            "errors": self.item_errors[(name, category)],
+            "error_rate": self.item_errors[(name, category)] / attempts
+        } for (name, category), attempts in self.item_attempts.items() if attempts >= min_item_attempts]
+        items.sort(key=lambda row: row["error_rate"], reverse=True)
+
+        category_errors = Counter()
+        for (category, _), count in self.confusions.items():
+            category_errors[category] += count
+        confusions = [{
+            "category": category,
+            "basket": basket,
+            "count": count,
+            "share_of_category_errors": count / category_errors[category]
+        } for (category, basket), count in self.confusions.most_common(top)]
+
+        first_level_sessions = self.level_sessions[min(self.level_sessions, default=1)] or 1
+        levels = [{
+            "level": level,
+            "sessions": self.level_sessions[level],
+            "retention": self.level_sessions[level] / first_level_sessions,
+            "attempts": self.level_attempts[level],
+            "accuracy": self.level_correct[level] / self.level_attempts[level] if self.level_attempts[level] else 0.0,
+            "sessions_ending_here": self.highest_levels[level]
+        } for level in sorted(self.level_sessions)]
+
+        return {
+            "sessions": self.sessions,
+            "events": self.events,
+            "hardest_items": items[:top],
+            "top_confusions": confusions,
+            "levels": levels,
+        }
+
+def chunk_tasks(directory, chunk_bytes=CHUNK_BYTES):
+    """
+    Yield lists of (path, start, end) work units of about chunk_bytes each.
+    Large JSON Lines segments are split; small files are grouped together.
+    """
+    batch = []
+    batch_bytes = 0
+    for path in session_files(directory):
+        size = os.path.getsize(path)
+        if not path.endswith(".jsonl"):
+            ranges = [(0, None)]
+        else:
+            ranges = [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+        for start, end in ranges:
+            batch.append((path, start, end))
+            batch_bytes += (size if end is None else end) - start
+            if batch_bytes >= chunk_bytes:
+                yield batch
+                batch = []
+                batch_bytes = 0
+    if batch:
+        yield batch
+
+def analyze_chunks(tasks):
+    """Aggregate the sessions in a list of work units (runs in a worker process)"""
+    stats = SessionStats()
+    for path, start, end in tasks:
+        for record in read_session_file(path, start, end):
+            stats.add_session(record)
+    return stats
+
+def analyze(directory=SESSION_DIR, workers=None, chunk_bytes=CHUNK_BYTES):
+    """Aggregate every saved session in a directory, in parallel when workers > 1"""
+    stats = SessionStats()
+    chunks = chunk_tasks(directory, chunk_bytes)
+    if workers == 1:
+        for tasks in chunks:
+            stats.merge(analyze_chunks(tasks))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(analyze_chunks, chunks):
+            stats.merge(partial)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate analytics over saved game sessions")
+    parser.add_argument("--data-dir", default=SESSION_DIR, help="Directory of saved session files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (1 runs inline)")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES // (1024 * 1024),
+                        help="Split JSON Lines segments into chunks of this size")
+    parser.add_argument("--top", type=int, default=20, help="Rows in each ranking")
+    parser.add_argument("--output", default="analytics_report.json", help="Path of the JSON report")
+    args = parser.parse_args()
+
+    started = time.time()
+    stats = analyze(args.data_dir, args.workers, args.chunk_mb * 1024 * 1024)
+    report = stats.report(top=args.top)
+    elapsed = time.time() - started
+    report["created"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    report["elapsed_seconds"] = elapsed
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Analyzed {report['sessions']} sessions ({report['events']} events) in {elapsed:.1f}s")
+    print("Hardest items:")
+    for row in report["hardest_items"][:5]:
+        print(f"  {row['item']} ({row['category']}): {row['error_rate']:.0%} of {row['attempts']} placements wrong")
+    print("Most confused categories:")
+    for row in report["top_confusions"][:5]:
+        print(f"  {row['category']} put in {row['basket']}: {row['count']} times")
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -11,14 +11,41 @@ from io import BytesIO
 import emoji
 from game_utils import (
     init_session_state, 
-    generate_items_for_level, 
-    check_sorting, 
     get_feedback,
     save_session_data,
-    get_emoji_for_item
+    get_emoji_for_item,
+    catalog_item,
+    catalog_basket,
+    CATEGORY_INDEX,
+    warm_level_plans
 )
-from ui_utils import load_css, show_celebration, display_avatar
-from hf_utils import get_bot_response
+from game_engine import GameEngine, InvalidMove, SORTED_CORRECTLY, LEVEL_COMPLETE
+from ui_utils import (
+    load_css,
+    show_image,
+    show_celebration,
+    display_avatar,
+    item_card_html,
+    basket_card_html,
+    card_grid_html,
+    sort_board,
+    fragment,
+    rerun,
+    timed_section,
+    STORE_RENDER_MODE
+)
+from hf_utils import (
+    get_bot_reply,
+    feedback_request,
+    fact_request,
+    summary_request,
+    prefetch_level,
+    get_generation_count,
+    PREFETCH_ENABLED
+)
+
+# Start of this script run, for rerun timings
+RUN_STARTED = time.perf_counter()
 
 # Set page configuration
 st.set_page_config(
@@ -28,29 +55,75 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Load custom CSS for child-friendly visuals
-load_css()
-
 # Initialize session state variables
 init_session_state()
 
-# Main app structure
-def main():
-    
-    st.markdown("<h1 class='game-title'>🛒 Shopping Sorter 🛒</h1>", unsafe_allow_html=True)
+# Load custom CSS for child-friendly visuals, for the current page only
+load_css(st.session_state.page)
+
+# Precompute level plans once per process so new levels are served instantly
+@st.cache_resource
+def _warm_level_plans():
+    warm_level_plans()
+    return True
+
+_warm_level_plans()
 
+def start_game():
+    """Start a new game for the current child"""
+    st.session_state.engine = GameEngine(int(st.session_state.child_age))
+    on_level_started()
+
+def on_level_started():
+    """Reset per-level state after the engine starts a new level"""
+    engine = st.session_state.engine
+    st.session_state.learning_tips = {}
     
-    # Show appropriate page based on session state
-    if st.session_state.page == 'welcome':
-        show_welcome_page()
-    elif st.session_state.page == 'instructions':
-        show_instructions_page()
-    elif st.session_state.page == 'game':
-        show_game_page()
-    elif st.session_state.page == 'results':
-        show_results_page()
+    # Prefetch every bot reply this level can trigger so clicks never wait on the model
+    finish_prefetch()
+    if PREFETCH_ENABLED:
+        st.session_state.level_prefetch = prefetch_level(engine.items, engine.baskets, st.session_state.child_age)
+
+def finish_prefetch():
+    """Stop the current level's prefetch and record its metrics"""
+    if st.session_state.level_prefetch is not None:
+        st.session_state.level_prefetch.finish()
+        st.session_state.level_prefetch = None
+
+def bot_reply(request):
+    """Get a bot reply, served from the level's prefetched replies when available"""
+    generated_before = get_generation_count()
+    if st.session_state.level_prefetch is not None:
+        reply = st.session_state.level_prefetch.reply(request)
     else:
-        show_welcome_page()  # Default to welcome page
+        reply = get_bot_reply(request)
+    # Count the backend calls made for the currently selected item
+    st.session_state.selection_bot_calls += get_generation_count() - generated_before
+    return reply
+
+def get_learning_tip(item):
+    """Return the fun fact for an item, generating it only once per level"""
+    tips = st.session_state.learning_tips
+    if item['id'] not in tips:
+        tips[item['id']] = bot_reply(fact_request(item['name'], st.session_state.child_age))
+    return tips[item['id']]
+
+# Main app structure
+def main():
+    with timed_section("app", started=RUN_STARTED):
+        st.markdown("<h1 class='game-title'>🛒 Shopping Sorter 🛒</h1>", unsafe_allow_html=True)
+        
+        # Show appropriate page based on session state
+        if st.session_state.page == 'welcome':
+            show_welcome_page()
+        elif st.session_state.page == 'instructions':
+            show_instructions_page()
+        elif st.session_state.page == 'game':
+            show_game_page()
+        elif st.session_state.page == 'results':
+            show_results_page()
+        else:
+            show_welcome_page()  # Default to welcome page
 
 def show_welcome_page():
     st.markdown("<div class='welcome-container'>", unsafe_allow_html=True)
@@ -91,7 +164,7 @@ def show_welcome_page():
                 st.session_state.child_name = name
                 st.session_state.child_age = ["3", "4", "5", "6", "7"][age_options.index(age)]
                 st.session_state.page = 'instructions'
-                st.experimental_rerun()
+                rerun()
             else:
                 st.warning("Please tell us your name first!")
     
@@ -105,7 +178,7 @@ def show_instructions_page():
 
     # Left column: image
     with left_col:
-        st.image("instructions.png", width=500)
+        show_image("instructions.png", width=500)
 
     with right_col:
         st.markdown("<h3>For example:</h3>", unsafe_allow_html=True)
@@ -152,54 +225,111 @@ def show_instructions_page():
 
 
             if st.button("🛒 Start Shopping!", key="start_game_button"):
-                items, baskets = generate_items_for_level(
-                    st.session_state.current_level,
-                    int(st.session_state.child_age)
-                )
-                st.session_state.current_items = items
-                st.session_state.current_baskets = baskets
+                start_game()
                 st.session_state.page = 'game'
-                st.experimental_rerun()
+                rerun()
 
 
 
 def show_game_page():
-    # Display game header with score and level
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col1:
-        st.markdown(f"<div class='score-display'>Stars: {st.session_state.score} ⭐</div>", unsafe_allow_html=True)
-    with col2:
-        st.markdown(f"<div style='text-align: center;'><h2>Level {st.session_state.current_level}</h2></div>", unsafe_allow_html=True)
-    with col3:
-        st.markdown(f"<div class='score-display'>Items: {len(st.session_state.current_items)}</div>", unsafe_allow_html=True)
+    # Start a game if there isn't one yet
+    if st.session_state.engine is None:
+        start_game()
     
-    # Display feedback if any
-    if st.session_state.feedback:
-        st.markdown(f"<div class='feedback feedback-{st.session_state.feedback_type}'>{st.session_state.feedback}</div>", 
-                   unsafe_allow_html=True)
-    
-    # Check if we need new items for this level
-    if not st.session_state.current_items:
-        items, baskets = generate_items_for_level(st.session_state.current_level, 
-                                                  int(st.session_state.child_age))
-        st.session_state.current_items = items
-        st.session_state.current_baskets = baskets
+    show_game_header(st.session_state.engine)
     
     # Game container
     #st.markdown("<div class='game-container'>", unsafe_allow_html=True)
     
+    show_play_area()
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    # Add end game button (the sort board has its own, so unsynced moves are saved)
+    if STORE_RENDER_MODE != "component" and st.button("Finish Shopping", key="finish_button"):
+        finish_game()
+
+def finish_game():
+    """Save the session and show the results"""
+    save_session_data()
+    finish_prefetch()
+    st.session_state.page = 'results'
+    rerun()
+
+def show_game_header(engine):
+    """Score, level and items left"""
+    with timed_section("header"):
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.markdown(f"<div class='score-display'>Stars: {engine.score} ⭐</div>", unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"<div style='text-align: center;'><h2>Level {engine.level}</h2></div>", unsafe_allow_html=True)
+        with col3:
+            st.markdown(f"<div class='score-display'>Items: {len(engine.items)}</div>", unsafe_allow_html=True)
+
+@fragment
+def show_play_area():
+    """
+    Feedback, store, baskets and learning tip. These sections depend on each
+    other (a pick changes the baskets and tip), so they rerun together as one
+    fragment; only correct placements, which change the header, rerun the app.
+    """
+    with timed_section("play_area"):
+        engine = st.session_state.engine
+        show_feedback()
+        
+        # Display store items and baskets
+        if STORE_RENDER_MODE == "component":
+            show_sort_board(engine)
+        elif STORE_RENDER_MODE == "html":
+            show_store_html(engine)
+            show_baskets_html(engine)
+        else:
+            show_store_columns(engine)
+            show_baskets_columns(engine)
+        
+        # The sort board shows the fun facts itself
+        if STORE_RENDER_MODE != "component":
+            show_learning_tip(engine)
+
+def show_feedback():
+    """Feedback on the last placement, if any"""
+    with timed_section("feedback"):
+        if st.session_state.feedback:
+            st.markdown(f"<div class='feedback feedback-{st.session_state.feedback_type}'>{st.session_state.feedback}</div>", 
+                       unsafe_allow_html=True)
+
+def show_learning_tip(engine):
+    """Fun fact for the selected item"""
+    with timed_section("learning_tip"):
+        if engine.selected_item:
+            item = engine.selected_item
+            try:
+                learning_tip = get_learning_tip(item)
+                if learning_tip:
+                    st.markdown(f"<div class='learning-tip'>{learning_tip}</div>", unsafe_allow_html=True)
+            except:
+                pass
+
+def placement_rerun(events):
+    """Rerun after a placement: the whole app if the score changed, else just the play area"""
+    rerun("app" if events[0].kind == SORTED_CORRECTLY else "fragment")
+
+def show_store_columns(engine):
+    """Store as rows of columns, with a card and a button per item"""
     # Display store items
     st.markdown("<div class='store-section'>", unsafe_allow_html=True)
     st.markdown("<h3>Pick an item from the store:</h3>", unsafe_allow_html=True)
     
     # Display items in rows of 4
     items_per_row = 4
-    for i in range(0, len(st.session_state.current_items), items_per_row):
+    store_items = list(engine.items)
+    for i in range(0, len(store_items), items_per_row):
         cols = st.columns(items_per_row)
         for j, col in enumerate(cols):
             idx = i + j
-            if idx < len(st.session_state.current_items):
-                item = st.session_state.current_items[idx]
+            if idx < len(store_items):
+                item = store_items[idx]
                 with col:
                     #st.markdown(f"<div class='item-card' id='{item['id']}'>", unsafe_allow_html=True)
                     st.markdown(f"<div class='item-emoji'>{get_emoji_for_item(item['type'], item['name'])}</div>", 
@@ -207,20 +337,23 @@ def show_game_page():
                     st.markdown(f"<div class='item-name'>{item['name']}</div>", unsafe_allow_html=True)
                     st.markdown("</div>", unsafe_allow_html=True)
                     if st.button(f"Pick", key=f"item_{idx}"):
-                        st.session_state.selected_item = item
-                        st.experimental_rerun()
+                        engine.pick(item)
+                        st.session_state.selection_bot_calls = 0
+                        rerun("fragment")
     
     st.markdown("</div>", unsafe_allow_html=True)
-    
+
+def show_baskets_columns(engine):
+    """Baskets as columns, with a card and a button per basket"""
     # Display baskets for sorting
     st.markdown("<div class='baskets-section'>", unsafe_allow_html=True)
     st.markdown("<h3>Put it in the right basket:</h3>", unsafe_allow_html=True)
     
-    basket_cols = st.columns(len(st.session_state.current_baskets))
+    basket_cols = st.columns(len(engine.baskets))
     
     # If an item is selected, enable sorting
-    if st.session_state.selected_item:
-        selected_item = st.session_state.selected_item
+    if engine.selected_item:
+        selected_item = engine.selected_item
         
         # Show selected item above baskets
         st.markdown(f"""
@@ -232,8 +365,8 @@ def show_game_page():
         
         # Display baskets
         for i, basket_col in enumerate(basket_cols):
-            if i < len(st.session_state.current_baskets):
-                basket = st.session_state.current_baskets[i]
+            if i < len(engine.baskets):
+                basket = engine.baskets[i]
                 with basket_col:
                     #st.markdown(f"<div class='basket' id='{basket['id']}'>", unsafe_allow_html=True)
                     st.markdown(f"<div class='basket-emoji'>{basket['emoji']}</div>", unsafe_allow_html=True)
@@ -242,89 +375,173 @@ def show_game_page():
                     
                     if st.button(f"Place Here", key=f"basket_{i}"):
                         # Process the sorting
-                        is_correct = check_sorting(selected_item, basket)
-                        st.session_state.total_attempts += 1
-                        
-                        # Update game history
-                        game_event = {
-                            "level": st.session_state.current_level,
-                            "item": {"type": selected_item["type"], "name": selected_item["name"]},
-                            "basket": basket["label"],
-                            "is_correct": is_correct,
-                            "timestamp": time.time()
-                        }
-                        st.session_state.game_history.append(game_event)
-                        
-                        if is_correct:
-                            # Remove the item from current items
-                            st.session_state.current_items = [s for s in st.session_state.current_items 
-                                                           if s["id"] != selected_item["id"]]
-                            st.session_state.score += max(1, st.session_state.current_level)
-                            
-                            # Generate feedback from bot
-                            try:
-                                bot_feedback = get_bot_response(
-                                    f"Give a very short, fun, child-friendly positive feedback (max 10 words) for correctly sorting {selected_item['name']} into {basket['label']}. Make it enthusiastic. Include an emoji."
-                                )
-                                feedback = bot_feedback if bot_feedback else f"Great job! {selected_item['name']} goes in {basket['label']}! 🎉"
-                            except:
-                                feedback = f"Great job! {selected_item['name']} goes in {basket['label']}! 🎉"
-                                
-                            st.session_state.feedback = feedback
-                            st.session_state.feedback_type = "positive"
-                            
-                            # Check if level is complete
-                            if not st.session_state.current_items:
-                                show_celebration()
-                                st.session_state.current_level += 1
-                                new_items, new_baskets = generate_items_for_level(
-                                    st.session_state.current_level, 
-                                    int(st.session_state.child_age)
-                                )
-                                st.session_state.current_items = new_items
-                                st.session_state.current_baskets = new_baskets
-                                st.session_state.feedback = f"Level {st.session_state.current_level-1} Complete! Moving to Level {st.session_state.current_level}! 🎉"
-                                st.session_state.feedback_type = "positive"
-                            
-                            st.session_state.selected_item = None
-                            st.experimental_rerun()
-                        else:
-                            # Wrong answer
-                            try:
-                                bot_feedback = get_bot_response(
-                                    f"Give a short, gentle, encouraging feedback (max 10 words) for a young child incorrectly sorting {selected_item['name']} into {basket['label']}. Make it child-friendly. Include an emoji."
-                                )
-                                feedback = bot_feedback if bot_feedback else f"Not quite! Try another basket for {selected_item['name']}. 🤔"
-                            except:
-                                feedback = f"Not quite! Try another basket for {selected_item['name']}. 🤔"
-                                
-                            st.session_state.feedback = feedback
-                            st.session_state.feedback_type = "negative"
-                            st.experimental_rerun()
+                        completed_level = engine.level
+                        events = engine.place(basket)
+                        render_place_events(events, selected_item, basket, completed_level)
+                        placement_rerun(events)
     
     st.markdown("</div>", unsafe_allow_html=True)
+
+def show_store_html(engine):
+    """Store as one HTML block and a single picker, whatever the level size"""
+    store_items = list(engine.items)
+    cards = [item_card_html(get_emoji_for_item(item['type'], item['name']), item['name']) for item in store_items]
+    st.markdown(
+        f"<div class='store-section'><h3>Pick an item from the store:</h3>{card_grid_html(cards, 'store-grid')}</div>",
+        unsafe_allow_html=True
+    )
+    
+    # Emoji first, for children who can't read the names yet.
+    # The key changes after every placement, which resets the picker
+    options = [f"{get_emoji_for_item(item['type'], item['name'])} {item['name']}" for item in store_items]
+    choice = st.radio(
+        "Pick an item",
+        options,
+        index=None,
+        horizontal=True,
+        key=f"store_pick_{engine.total_attempts}",
+        label_visibility="collapsed"
+    )
+    if choice is not None and store_items[options.index(choice)] != engine.selected_item:
+        engine.pick(store_items[options.index(choice)])
+        st.session_state.selection_bot_calls = 0
+        rerun("fragment")
+
+def show_baskets_html(engine):
+    """Selected item and baskets as one HTML block and a single picker"""
+    if not engine.selected_item:
+        st.markdown("<div class='baskets-section'><h3>Put it in the right basket:</h3></div>", unsafe_allow_html=True)
+        return
+    selected_item = engine.selected_item
+    
+    cards = [basket_card_html(basket['emoji'], basket['label']) for basket in engine.baskets]
+    st.markdown(
+        "<div class='baskets-section'><h3>Put it in the right basket:</h3>"
+        "<div class='selected-item-container'>"
+        f"<div class='selected-item-emoji'>{get_emoji_for_item(selected_item['type'], selected_item['name'])}</div>"
+        f"<div class='selected-item-prompt'>Where does the {selected_item['name']} go?</div>"
+        f"</div>{card_grid_html(cards, 'basket-grid')}</div>",
+        unsafe_allow_html=True
+    )
+    
+    options = [f"{basket['emoji']} {basket['label']}" for basket in engine.baskets]
+    choice = st.radio(
+        "Choose a basket",
+        options,
+        index=None,
+        horizontal=True,
+        key=f"basket_pick_{engine.total_attempts}",
+        label_visibility="collapsed"
+    )
+    if choice is not None:
+        # Process the sorting
+        basket = engine.baskets[options.index(choice)]
+        completed_level = engine.level
+        events = engine.place(basket)
+        render_place_events(events, selected_item, basket, completed_level)
+        placement_rerun(events)
+
+def show_sort_board(engine):
+    """Store and baskets sorted in the browser, with moves synced here in batches"""
+    # The token changes whenever the server state does, so each batch is applied once
+    token = f"{engine.level}:{engine.total_attempts}:{st.session_state.board_syncs}"
+    store_items = list(engine.items)
+    # Picks stay in the browser, so every item's fun fact ships with the board.
+    # Every item is picked before a level ends, so this asks the bot about as
+    # often as the other modes do.
+    result = sort_board(
+        items=[{"id": item.index, "name": item['name'], "emoji": get_emoji_for_item(item['type'], item['name']),
+                "fact": board_fact(item)}
+               for item in store_items],
+        baskets=[{"id": basket.index, "label": basket['label'], "emoji": basket['emoji']}
+                 for basket in engine.baskets],
+        categories={str(item.index): CATEGORY_INDEX[item['type']] for item in store_items},
+        token=token,
+        selected=engine.selected_item.index if engine.selected_item else None,
+        key="sort_board"
+    )
+    if result and result.get("token") == token:
+        apply_board_moves(engine, result.get("moves", []))
+        st.session_state.board_syncs += 1
+        if result.get("finish"):
+            finish_game()
+        rerun()
+
+def board_fact(item):
+    """Fun fact shown on the sort board when an item is picked"""
+    try:
+        return get_learning_tip(item) or ""
+    except Exception:
+        return ""
+
+def apply_board_moves(engine, moves):
+    """Check and score a batch of moves from the sort board, as if each had been clicked"""
+    now = time.time()
+    last_time = float(engine.history.to_numpy()["timestamp"][-1]) if engine.history else 0.0
+    placements = []
+    for move in moves:
+        completed_level = engine.level
+        try:
+            item = catalog_item(int(move["item"]))
+            basket = catalog_basket(int(move["basket"]))
+            # Browser clocks can't be trusted: keep times in order and never in the future
+            timestamp = min(max(float(move.get("t", now)), last_time), now)
+            events = engine.apply_move(item.index, basket.index, timestamp)
+        except (InvalidMove, KeyError, IndexError, TypeError, ValueError):
+            # The board was out of date; it is redrawn from the server state
+            break
+        last_time = timestamp
+        placements.append((events, item, basket, completed_level))
+    # Only the last move's feedback is shown, so only it asks the bot
+    for i, placement in enumerate(placements):
+        # Each move is its own selection in the bot call log
+        st.session_state.selection_bot_calls = 0
+        render_place_events(*placement, with_feedback=i == len(placements) - 1)
+
+def render_place_events(events, selected_item, basket, completed_level, with_feedback=True):
+    """Turn the engine's events for a placement into feedback (bookkeeping only without with_feedback)"""
+    kinds = [event.kind for event in events]
     
-    # Add learning tip if available
-    if st.session_state.selected_item:
-        item = st.session_state.selected_item
+    if SORTED_CORRECTLY in kinds:
+        if with_feedback:
+            # Generate feedback from bot
+            try:
+                bot_feedback = bot_reply(
+                    feedback_request(selected_item['name'], basket['label'], True)
+                )
+                feedback = bot_feedback if bot_feedback else f"Great job! {selected_item['name']} goes in {basket['label']}! 🎉"
+            except:
+                feedback = f"Great job! {selected_item['name']} goes in {basket['label']}! 🎉"
+                
+            st.session_state.feedback = feedback
+            st.session_state.feedback_type = "positive"
+        
+        # Check if level is complete
+        if LEVEL_COMPLETE in kinds:
+            show_celebration()
+            on_level_started()
+            st.session_state.feedback = f"Level {completed_level} Complete! Moving to Level {st.session_state.engine.level}! 🎉"
+            st.session_state.feedback_type = "positive"
+        
+        st.session_state.bot_call_log.append({
+            "item": selected_item["name"],
+            "backend_calls": st.session_state.selection_bot_calls
+        })
+    elif with_feedback:
+        # Wrong answer
         try:
-            learning_tip = get_bot_response(
-                f"Give a simple, fun fact about {item['name']} that a {st.session_state.child_age} year old child would find interesting. Keep it to one short, simple sentence. Include an emoji."
+            bot_feedback = bot_reply(
+                feedback_request(selected_item['name'], basket['label'], False)
             )
-            if learning_tip:
-                st.markdown(f"<div class='learning-tip'>{learning_tip}</div>", unsafe_allow_html=True)
+            feedback = bot_feedback if bot_feedback else f"Not quite! Try another basket for {selected_item['name']}. 🤔"
         except:
-            pass
-    
-    st.markdown("</div>", unsafe_allow_html=True)
-    
-    # Add end game button
-    if st.button("Finish Shopping", key="finish_button"):
-        save_session_data()
-        st.session_state.page = 'results'
-        st.experimental_rerun()
+            feedback = f"Not quite! Try another basket for {selected_item['name']}. 🤔"
+            
+        st.session_state.feedback = feedback
+        st.session_state.feedback_type = "negative"
 
 def show_results_page():
+    engine = st.session_state.engine
     st.markdown(f"<h1 class='results-title'>Great Shopping, {st.session_state.child_name}! 🎉</h1>", unsafe_allow_html=True)
     
     # Shopping results animation
@@ -345,19 +562,22 @@ def show_results_page():
     # Display results
     col1, col2 = st.columns([1, 1])
     
+    # Running totals kept by the engine, so nothing here scans the history
+    stats = engine.stats
+    
     with col1:
-        st.markdown(f"<div class='final-score'>You earned {st.session_state.score} stars! ⭐</div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='final-score'>You earned {engine.score} stars! ⭐</div>", unsafe_allow_html=True)
         
-        # Calculate performance metrics
-        correct_answers = sum(1 for event in st.session_state.game_history if event["is_correct"])
-        accuracy = correct_answers / max(1, st.session_state.total_attempts) * 100
+        # Performance metrics
+        correct_answers = stats.correct
+        accuracy = stats.accuracy()
         
         st.markdown(f"""
         <div class='achievements-card'>
             <h3>Your Shopping Trip:</h3>
             <ul>
-                <li>Reached Level: {st.session_state.current_level}</li>
-                <li>Items Sorted: {st.session_state.total_attempts}</li>
+                <li>Reached Level: {engine.level}</li>
+                <li>Items Sorted: {engine.total_attempts}</li>
                 <li>Correct Sorts: {correct_answers}</li>
             </ul>
         </div>
@@ -367,7 +587,7 @@ def show_results_page():
         # Display badges based on performance
         badges = []
         
-        if st.session_state.current_level >= 3:
+        if engine.level >= 3:
             badges.append({
                 "name": "Super Shopper", 
                 "emoji": "🛒", 
@@ -381,7 +601,7 @@ def show_results_page():
                 "description": "Great at sorting items!"
             })
             
-        if st.session_state.score >= 15:
+        if engine.score >= 15:
             badges.append({
                 "name": "Food Expert", 
                 "emoji": "🍽️", 
@@ -409,19 +629,13 @@ def show_results_page():
     
     # Get learning summary from Hugging Face model
     try:
-        # Count the most common categories the child interacted with
-        categories = {}
-        for event in st.session_state.game_history:
-            if event["basket"] not in categories:
-                categories[event["basket"]] = 1
-            else:
-                categories[event["basket"]] += 1
-        
-        top_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:2]
-        top_categories_str = ", ".join([cat[0] for cat in top_categories])
-        
-        learning_summary = get_bot_response(
-            f"Give a very short, encouraging summary (2-3 sentences) for a {st.session_state.child_age} year old child named {st.session_state.child_name} who has been learning about food groups. They worked especially with {top_categories_str}. Be positive and encouraging about their learning journey. Make it very child-friendly."
+        # The most common categories the child interacted with
+        learning_summary = get_bot_reply(
+            summary_request(
+                st.session_state.child_name,
+                st.session_state.child_age,
+                stats.top_baskets(2)
+            )
         )
         
         if learning_summary:
@@ -434,15 +648,11 @@ def show_results_page():
     with col1:
         if st.button("Shop Again 🔄", key="play_again_button"):
             # Reset game state but keep name and age
-            st.session_state.score = 0
-            st.session_state.total_attempts = 0
-            st.session_state.current_level = 1
-            st.session_state.current_items = []
-            st.session_state.current_baskets = []
+            st.session_state.engine = None
             st.session_state.feedback = ''
-            st.session_state.game_history = []
+            st.session_state.bot_call_log = []
             st.session_state.page = 'instructions'
-            st.experimental_rerun()
+            rerun()
     
     with col2:
         if st.button("New Shopper 👋", key="new_player_button"):
@@ -450,24 +660,21 @@ def show_results_page():
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.session_state.page = 'welcome'
-            st.experimental_rerun()
+            rerun()
     
     # Display progress graph
-    if len(st.session_state.game_history) > 5:
+    if stats.attempts > 5:
         st.markdown("<h3>Your Shopping Progress:</h3>", unsafe_allow_html=True)
         
-        # Convert game history to DataFrame
-        df = pd.DataFrame(st.session_state.game_history)
-        df['timestamp_str'] = pd.to_datetime(df['timestamp'], unit='s').dt.strftime('%H:%M:%S')
-        
-        # Calculate cumulative correct answers
-        correct_df = df[df['is_correct']].copy()
-        if not correct_df.empty:
-            correct_df['cumulative_correct'] = range(1, len(correct_df) + 1)
+        # Cumulative correct answers over time
+        if stats.correct_times:
+            chart_data = pd.DataFrame(
+                {'cumulative_correct': range(1, len(stats.correct_times) + 1)},
+                index=pd.Index(stats.correct_times, name='timestamp_str')
+            )
             
             # Simple progress chart
-            chart_data = correct_df[['timestamp_str', 'cumulative_correct']]
-            st.line_chart(chart_data.set_index('timestamp_str'))
+            st.line_chart(chart_data)
 
 # Run the main app
 if __name__ == "__main__":
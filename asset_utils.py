@@ -0,0 +1,87 @@
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+# Static files the app serves to browsers (stylesheets, image variants). The
+# folder is generated, either at startup or ahead of time by build_assets.py.
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "assets")
+
+# Screen densities to encode image variants for: 1x plus retina displays
+IMAGE_DENSITIES = (1, 1.5, 2)
+WEBP_QUALITY = 80
+
+def asset_version(data):
+    """Short content hash used to version asset URLs"""
+    return hashlib.sha1(data).hexdigest()[:10]
+
+def write_asset(filename, data, directory=ASSET_DIR):
+    """Atomically write bytes to the asset folder unless the file already holds them"""
+    path = os.path.join(directory, filename)
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return path
+    except OSError:
+        pass
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+def variant_widths(width, source_width, densities=IMAGE_DENSITIES):
+    """Pixel widths to encode for a display width, never wider than the source"""
+    return sorted({min(source_width, round(width * density)) for density in densities})
+
+def encode_image(image, fmt):
+    """Encode a Pillow image as "webp" or "png" bytes"""
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+def variant_filename(path, fmt, width):
+    """Asset file name of one variant, e.g. instructions-500w.webp"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{width}w.{fmt}"
+
+def image_variants(path, width, directory=ASSET_DIR):
+    """
+    Right-sized copies of an image shown `width` px wide: WebP at every screen
+    density and a 1x PNG fallback. Returns {(format, width): (filename, bytes)}.
+    Variants already built in `directory` are reused; missing or stale ones
+    are encoded and written there.
+    """
+    source_mtime = os.path.getmtime(path)
+    variants = {}
+    source = None
+    try:
+        with Image.open(path) as image:
+            source_width, source_height = image.size
+            widths = variant_widths(width, source_width)
+            wanted = [("webp", w) for w in widths] + [("png", widths[0])]
+            for fmt, w in wanted:
+                filename = variant_filename(path, fmt, w)
+                asset_path = os.path.join(directory, filename)
+                if os.path.exists(asset_path) and os.path.getmtime(asset_path) >= source_mtime:
+                    with open(asset_path, "rb") as f:
+                        variants[(fmt, w)] = (filename, f.read())
+                    continue
+                if source is None:
+                    source = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+                resized = source.resize((w, round(source_height * w / source_width)), Image.LANCZOS)
+                data = encode_image(resized, fmt)
+                try:
+                    write_asset(filename, data, directory)
+                except OSError as e:
+                    print(f"Error writing image variant {filename}: {e}")
+                variants[(fmt, w)] = (filename, data)
+    finally:
+        if source is not None:
+            source.close()
+    return variants
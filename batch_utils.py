@@ -0,0 +1,107 @@
+import numpy as np
+
+from game_utils import (
+    FOOD_CATEGORIES,
+    CATEGORY_NAMES,
+    CATEGORY_ITEMS,
+    ITEM_CATEGORIES,
+    CATALOG_BASKETS,
+    LevelItems
+)
+
+# Catalog layout as arrays. Items of a category have contiguous catalog indices.
+_ITEM_CATEGORY = np.frombuffer(ITEM_CATEGORIES, dtype=np.uint8).astype(np.int64)
+_CATEGORY_SIZES = np.array([len(items) for items in CATEGORY_ITEMS], dtype=np.int64)
+_CATEGORY_STARTS = np.array([items[0] for items in CATEGORY_ITEMS], dtype=np.int64)
+
+class LevelBatch:
+    """
+    Columnar result of generate_levels: one row per level.
+    Baskets and items are stored as flat index arrays with CSR-style offsets,
+    so row i's items are items[item_offsets[i]:item_offsets[i + 1]].
+    """
+
+    def __init__(self, levels, ages, baskets, basket_offsets, items, item_offsets):
+        self.levels = levels                  # int16, level number per row
+        self.ages = ages                      # int8, child age per row
+        self.baskets = baskets                # uint8, category indices
+        self.basket_offsets = basket_offsets  # int64, len(rows) + 1
+        self.items = items                    # uint16, catalog item indices in display order
+        self.item_offsets = item_offsets      # int64, len(rows) + 1
+
+    def __len__(self):
+        return len(self.levels)
+
+    def level_at(self, row):
+        """Return (items, baskets) for one row, as generate_items_for_level does"""
+        items = self.items[self.item_offsets[row]:self.item_offsets[row + 1]]
+        baskets = self.baskets[self.basket_offsets[row]:self.basket_offsets[row + 1]]
+        return LevelItems(items.tolist()), [CATALOG_BASKETS[category] for category in baskets.tolist()]
+
+    def nbytes(self):
+        """Total memory used by the arrays"""
+        return sum(array.nbytes for array in (self.levels, self.ages, self.baskets,
+                                              self.basket_offsets, self.items, self.item_offsets))
+
+def batch_difficulty(levels, ages):
+    """Vectorized level_difficulty: (num_categories, items_per_category, num_available)"""
+    num_categories = np.minimum(3 + levels // 2, 5)
+    items_per_category = np.minimum(2 + levels, 5)
+
+    # Reduce complexity for younger children
+    young = ages < 5
+    num_categories = np.where(young, np.minimum(num_categories, 3), num_categories)
+    items_per_category = np.where(young, np.minimum(items_per_category, 3), items_per_category)
+
+    # Advanced categories from level 3 for children 5 and older
+    num_available = np.where((levels >= 3) & ~young, len(CATEGORY_NAMES), len(FOOD_CATEGORIES))
+
+    return num_categories, items_per_category, num_available
+
+def generate_levels(levels, ages, seed=None):
+    """
+    Generate one level per (level, age) pair in a single vectorized pass.
+    Follows the same difficulty rules as generate_items_for_level and
+    returns a LevelBatch.
+    """
+    levels = np.asarray(levels, dtype=np.int64).ravel()
+    ages = np.broadcast_to(np.asarray(ages, dtype=np.int64), levels.shape).ravel()
+    rows = len(levels)
+    num_category_total = len(CATEGORY_NAMES)
+    rng = np.random.default_rng(seed)
+    num_categories, items_per_category, num_available = batch_difficulty(levels, ages)
+
+    # Random category order per row; unavailable categories sort last
+    category_keys = rng.random((rows, num_category_total))
+    category_keys[np.arange(num_category_total)[None, :] >= num_available[:, None]] = np.inf
+    category_order = np.argsort(category_keys, axis=1)
+    picked = np.arange(num_category_total)[None, :] < num_categories[:, None]
+    selected = np.zeros((rows, num_category_total), dtype=bool)
+    np.put_along_axis(selected, category_order, picked, axis=1)
+
+    # Baskets: selected categories in their random order
+    basket_counts = picked.sum(axis=1)
+    baskets = category_order[picked].astype(np.uint8)
+
+    # Random order of items within each category: sorting on category + key in [0, 1)
+    # keeps categories contiguous, so the rank is the position minus the category start
+    item_keys = rng.random((rows, len(_ITEM_CATEGORY)))
+    item_order = np.argsort(_ITEM_CATEGORY[None, :] + item_keys, axis=1)
+    item_rank = np.arange(len(_ITEM_CATEGORY))[None, :] - _CATEGORY_STARTS[_ITEM_CATEGORY][None, :]
+    in_sample = (item_rank < items_per_category[:, None]) & selected[:, _ITEM_CATEGORY]
+    sampled = np.where(in_sample, item_order, -1)
+
+    # Shuffle the sampled items of each row
+    shuffle_keys = np.where(in_sample, rng.random(in_sample.shape), np.inf)
+    shuffled = np.take_along_axis(sampled, np.argsort(shuffle_keys, axis=1), axis=1)
+    item_counts = in_sample.sum(axis=1)
+    items = shuffled[np.arange(len(_ITEM_CATEGORY))[None, :] < item_counts[:, None]].astype(np.uint16)
+
+    return LevelBatch(
+        levels.astype(np.int16),
+        ages.astype(np.int8),
+        baskets,
+        np.concatenate(([0], np.cumsum(basket_counts))),
+        items,
+        np.concatenate(([0], np.cumsum(item_counts))),
+    )
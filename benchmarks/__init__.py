@@ -0,0 +1 @@
+"""Load generators and throughput benchmarks for Shopping Sorter."""
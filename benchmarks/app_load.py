@@ -0,0 +1,223 @@
+"""
+End-to-end load test of app.py using Streamlit's AppTest runner.
+
+Each virtual user plays the full flow (welcome -> instructions -> game ->
+results) in its own in-process app session. Every script run is timed, and
+the delta elements it emits are counted and sized, so UI changes can be
+compared against a baseline. Runs fully offline; the bot uses its canned
+responses. Finished sessions are saved to data/ as in normal play.
+
+Usage:
+    python -m benchmarks.app_load --users 20 --levels 3 --render-modes columns html --output app_load.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+import hf_utils
+import ui_utils
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+
+# AppTest in Streamlit 1.29 replays a clicked button's value when the script
+# reruns itself, which loops forever. The harness turns st.rerun and
+# st.experimental_rerun into st.stop, so an interaction run ends where the real
+# one would, and performs the follow-up run itself, as a browser rerun does.
+APP_SCRIPT = f"""
+import streamlit as st
+st.rerun = st.experimental_rerun = lambda *args, **kwargs: st.stop()
+with open({APP_PATH!r}, encoding="utf-8") as f:
+    exec(compile(f.read(), {APP_PATH!r}, "exec"), {{"__name__": "__main__", "__file__": {APP_PATH!r}}})
+"""
+
+def count_deltas(node):
+    """Return (delta count, serialized bytes) for the elements under a tree node"""
+    count = 0
+    size = 0
+    children = getattr(node, "children", None) or {}
+    for child in children.values():
+        proto = getattr(child, "proto", None)
+        if proto is not None:
+            count += 1
+            size += proto.ByteSize()
+        child_count, child_size = count_deltas(child)
+        count += child_count
+        size += child_size
+    return count, size
+
+class VirtualUser:
+    """One simulated child driving the app through AppTest"""
+
+    def __init__(self, user_id, error_rate=0.2, seed=None, timeout=30):
+        self.user_id = user_id
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.app = AppTest.from_string(APP_SCRIPT, default_timeout=timeout)
+        self.runs = []
+
+    def _section_counts(self):
+        """How many times each timed section of the app has run so far"""
+        if not self.runs or "rerun_timings" not in self.app.session_state:
+            return {}
+        return {name: stats["count"] for name, stats in self.app.session_state.rerun_timings.items()}
+
+    def _run(self, kind, widget=None):
+        """Run the script once (after an interaction if widget is given) and record it"""
+        page = self.app.session_state.page if self.runs else "welcome"
+        engine = self.app.session_state.engine if self.runs else None
+        counts = self._section_counts()
+        level_size = len(engine.items) + len(engine.baskets) if engine is not None else 0
+        started = time.perf_counter()
+        if widget is None:
+            self.app.run()
+        else:
+            widget.run()
+        elapsed = time.perf_counter() - started
+        if self.app.exception:
+            raise RuntimeError(f"User {self.user_id}: app raised {self.app.exception[0].message}")
+        deltas, size = count_deltas(self.app._tree)
+        # Time the app spent in each section that ran this time
+        timings = self.app.session_state.rerun_timings
+        sections = {name: stats["last"] for name, stats in timings.items()
+                    if stats["count"] > counts.get(name, 0)}
+        self.runs.append({"page": page, "kind": kind, "level_size": level_size,
+                          "seconds": elapsed, "deltas": deltas, "bytes": size, "sections": sections})
+
+    def interact(self, widget):
+        """Click or edit a widget, then rerun as the browser would"""
+        self._run("interaction", widget)
+        self._run("render")
+
+    def pick_first_item(self, engine):
+        """Pick the first item in the store"""
+        if ui_utils.STORE_RENDER_MODE == "html":
+            # AppTest selects radio options by their displayed label
+            picker = self.app.radio(key=f"store_pick_{engine.total_attempts}")
+            self.interact(picker.set_value(picker.options[0]))
+        else:
+            self.interact(self.app.button(key="item_0").click())
+
+    def place(self, engine, basket_position):
+        """Put the selected item in the basket at a position"""
+        if ui_utils.STORE_RENDER_MODE == "html":
+            picker = self.app.radio(key=f"basket_pick_{engine.total_attempts}")
+            self.interact(picker.set_value(picker.options[basket_position]))
+        else:
+            self.interact(self.app.button(key=f"basket_{basket_position}").click())
+
+    def play(self, levels):
+        """Play the full flow through `levels` completed levels"""
+        self._run("render")
+        self.app.text_input(key="name_input").input(f"Kid{self.user_id}")
+        self.interact(self.app.button(key="start_button").click())
+        self.interact(self.app.button(key="start_game_button").click())
+
+        engine = self.app.session_state.engine
+        while engine.level <= levels:
+            self.pick_first_item(engine)
+            labels = [basket["label"] for basket in engine.baskets]
+            correct = labels.index(engine.selected_item["type"])
+            if len(labels) > 1 and self.rng.random() < self.error_rate:
+                wrong = self.rng.choice([i for i in range(len(labels)) if i != correct])
+                self.place(engine, wrong)
+            self.place(engine, correct)
+
+        self.interact(self.app.button(key="finish_button").click())
+        return self.runs
+
+def summarize(runs, group_key):
+    """Aggregate run records by a key into latency and delta statistics"""
+    groups = {}
+    for run in runs:
+        groups.setdefault(run[group_key], []).append(run)
+    summary = {}
+    for key, group in sorted(groups.items()):
+        ms = np.array([run["seconds"] for run in group]) * 1000
+        summary[str(key)] = {
+            "runs": len(group),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "mean_deltas": float(np.mean([run["deltas"] for run in group])),
+            "mean_bytes": float(np.mean([run["bytes"] for run in group])),
+        }
+    return summary
+
+def summarize_sections(runs):
+    """Mean milliseconds per timed app section over a set of runs"""
+    totals = {}
+    for run in runs:
+        for name, seconds in run["sections"].items():
+            totals.setdefault(name, []).append(seconds * 1000)
+    return {name: float(np.mean(values)) for name, values in sorted(totals.items())}
+
+def run_load_test(users, levels, error_rate=0.2, seed=0, render_mode=ui_utils.STORE_RENDER_MODE):
+    """Play `users` sessions with the given store render mode and return all run records"""
+    # Always offline: the bot answers from its canned responses
+    hf_utils.configure_client(None)
+    ui_utils.STORE_RENDER_MODE = render_mode
+    runs = []
+    for user_id in range(users):
+        runs.extend(VirtualUser(user_id, error_rate, seed + user_id).play(levels))
+    return runs
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end Streamlit load test")
+    parser.add_argument("--users", type=int, default=10, help="Number of virtual users")
+    parser.add_argument("--levels", type=int, default=2, help="Levels each user completes")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Chance of a wrong basket first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--render-modes", nargs="+", default=["columns", "html"],
+                        choices=["columns", "html"], help="Store render modes to compare")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    results = {}
+    for mode in args.render_modes:
+        started = time.perf_counter()
+        runs = run_load_test(args.users, args.levels, args.error_rate, args.seed, mode)
+        elapsed = time.perf_counter() - started
+
+        by_page = summarize(runs, "page")
+        game_runs = [run for run in runs if run["page"] == "game" and run["kind"] == "render"]
+        by_level_size = summarize(game_runs, "level_size")
+        game_sections = summarize_sections(game_runs)
+        results[mode] = {
+            "elapsed_seconds": elapsed,
+            "by_page": by_page,
+            "game_by_level_size": by_level_size,
+            "game_section_ms": game_sections,
+        }
+
+        print(f"[{mode}] {len(runs)} script runs for {args.users} users in {elapsed:.1f}s")
+        for page, stats in by_page.items():
+            print(f"{page:>13}: p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms  "
+                  f"{stats['mean_deltas']:.0f} deltas  {stats['mean_bytes'] / 1024:.1f} KiB per run")
+        print("Game page renders by level size (items + baskets):")
+        for size, stats in by_level_size.items():
+            print(f"{size:>13}: p50 {stats['p50_ms']:.1f} ms  {stats['mean_deltas']:.0f} deltas  "
+                  f"{stats['mean_bytes'] / 1024:.1f} KiB")
+        print("Game page time per section (mean ms): "
+              + "  ".join(f"{name} {ms:.2f}" for name, ms in game_sections.items()))
+        if game_sections.get("app") and "play_area" in game_sections:
+            print(f"A play-area fragment rerun needs {game_sections['play_area'] / game_sections['app']:.0%} "
+                  f"of the time of a full app rerun")
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "settings": vars(args),
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Exercise ModelClient against a local stand-in model server.
+
+Starts a small HTTP server on localhost that answers like a Hugging Face
+text-generation endpoint, with one path per failure mode, and checks that the
+client succeeds, retries 503s, hedges a slow primary and gives up when the
+latency budget runs out. Also checks that get_bot_reply falls back to a canned
+response when the backend is down. Runs fully offline.
+
+Usage:
+    python -m benchmarks.client_check
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import hf_utils
+from hf_client import ModelClient, ModelClientError
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    /ok answers at once, /flaky returns 503 for its first two requests,
+    /slow-first stalls its first request only, /slow always stalls and
+    /down always returns 503.
+    """
+
+    counts = {}
+    lock = threading.Lock()
+    stall_seconds = 1.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        prompt = json.loads(self.rfile.read(length) or b"{}").get("inputs", "")
+        with self.lock:
+            count = self.counts[self.path] = self.counts.get(self.path, 0) + 1
+        if self.path == "/down" or (self.path == "/flaky" and count <= 2):
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path == "/slow" or (self.path == "/slow-first" and count == 1):
+            time.sleep(self.stall_seconds)
+        body = json.dumps([{"generated_text": f"{prompt} Stand-in reply {count} 🍎"}]).encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # The client gave up on this request
+
+    def log_message(self, *args):
+        pass
+
+def check_success(base_url):
+    client = ModelClient(f"{base_url}/ok", hedge=False)
+    text = client.generate("Hello")
+    stats = client.get_stats()
+    client.close()
+    assert text.startswith("Stand-in reply"), text
+    assert stats["attempts"] == 1 and stats["retries"] == 0, stats
+    return f"{text!r} in {stats['attempts']} attempt"
+
+def check_retry(base_url):
+    client = ModelClient(f"{base_url}/flaky", hedge=False)
+    text = client.generate("Hello", budget=5.0, max_retries=2)
+    stats = client.get_stats()
+    client.close()
+    assert stats["retries"] == 2 and stats["failures"] == 0, stats
+    return f"{text!r} after {stats['retries']} retries"
+
+def check_hedge(base_url):
+    # With no latency history the hedge fires after half the per-attempt timeout
+    client = ModelClient(f"{base_url}/slow-first", timeout=1.5, max_retries=0)
+    started = time.monotonic()
+    text = client.generate("Hello", budget=2.0)
+    elapsed = time.monotonic() - started
+    stats = client.get_stats()
+    client.close()
+    assert text.startswith("Stand-in reply"), text
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1, stats
+    assert elapsed < StandInHandler.stall_seconds, elapsed
+    return f"backup won in {elapsed * 1000:.0f} ms"
+
+def check_budget(base_url):
+    client = ModelClient(f"{base_url}/slow", timeout=0.3, hedge=False)
+    started = time.monotonic()
+    try:
+        client.generate("Hello", budget=0.5, max_retries=2)
+    except ModelClientError:
+        pass
+    else:
+        raise AssertionError("Slow backend did not exhaust the budget")
+    elapsed = time.monotonic() - started
+    stats = client.get_stats()
+    client.close()
+    assert elapsed < 0.5 + 0.2, elapsed
+    assert stats["deadline_exceeded"] == 1 and stats["failures"] == 1, stats
+    return f"gave up after {elapsed * 1000:.0f} ms"
+
+def check_fallback(base_url):
+    hf_utils.configure_client(f"{base_url}/down", hedge=False)
+    hf_utils.configure_cache()
+    try:
+        reply = hf_utils.get_bot_reply(hf_utils.feedback_request("Banana", "Fruits", True))
+    finally:
+        hf_utils.configure_client(None)
+    assert reply in hf_utils.FALLBACK_POSITIVE_FEEDBACK, reply
+    assert hf_utils.get_cache_stats()["size"] == 0, "Fallback reply was cached"
+    return f"canned reply {reply!r}, not cached"
+
+CHECKS = [
+    ("success", check_success),
+    ("503 then retry", check_retry),
+    ("slow primary, hedge wins", check_hedge),
+    ("budget exhausted", check_budget),
+    ("backend down, canned fallback", check_fallback),
+]
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    failed = 0
+    for name, check in CHECKS:
+        try:
+            print(f"PASS {name}: {check(base_url)}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL {name}: {e!r}")
+    server.shutdown()
+    print(f"{len(CHECKS) - failed}/{len(CHECKS)} checks passed")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
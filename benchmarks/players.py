@@ -0,0 +1,58 @@
+import random
+
+from game_utils import CATEGORY_INDEX
+
+# Chance of choosing a wrong basket, by child age
+ERROR_RATE_BY_AGE = {3: 0.45, 4: 0.35, 5: 0.25, 6: 0.15, 7: 0.10}
+
+class Player:
+    """Simulated player: chooses an item to pick and a basket to place it in"""
+
+    name = "player"
+
+    def __init__(self, age=5, seed=None):
+        self.age = age
+        self.rng = random.Random(seed)
+
+    def choose_item(self, engine):
+        return self.rng.choice(list(engine.items))
+
+    def choose_basket(self, engine):
+        return self.rng.choice(engine.baskets)
+
+    def correct_basket(self, engine):
+        category = CATEGORY_INDEX[engine.selected_item["type"]]
+        for basket in engine.baskets:
+            if basket.index == category:
+                return basket
+        return engine.baskets[0]
+
+class RandomPlayer(Player):
+    """Picks items and baskets uniformly at random"""
+
+    name = "random"
+
+class PerfectPlayer(Player):
+    """Always places the selected item in the right basket"""
+
+    name = "perfect"
+
+    def choose_basket(self, engine):
+        return self.correct_basket(engine)
+
+class ErrorPronePlayer(Player):
+    """Places items correctly except for an age-dependent error rate"""
+
+    name = "error_prone"
+
+    def __init__(self, age=5, seed=None):
+        super().__init__(age, seed)
+        self.error_rate = ERROR_RATE_BY_AGE.get(age, 0.25)
+
+    def choose_basket(self, engine):
+        if len(engine.baskets) > 1 and self.rng.random() < self.error_rate:
+            correct = self.correct_basket(engine)
+            return self.rng.choice([basket for basket in engine.baskets if basket != correct])
+        return self.correct_basket(engine)
+
+PLAYERS = {player.name: player for player in (RandomPlayer, PerfectPlayer, ErrorPronePlayer)}
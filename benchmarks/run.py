@@ -0,0 +1,126 @@
+"""
+Drive the game loop with simulated players and report throughput.
+
+Each move picks an item, places it, and asks the bot for feedback (plus a fun
+fact once per picked item, as the game page does). Finished sessions are saved
+with the same code path as the app.
+
+Usage:
+    python -m benchmarks.run --sessions 200 --moves 60 --output bench_results.json
+"""
+import argparse
+import json
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from game_engine import GameEngine, SORTED_CORRECTLY
+from game_utils import build_session_data, write_session_data
+from session_store import close_session_writer
+from hf_utils import get_bot_reply, feedback_request, fact_request, get_cache_stats
+from benchmarks.players import PLAYERS
+
+def play_session(player, moves, seed, data_dir, latencies, save_latencies=None):
+    """Play one session of `moves` placements, recording per-move and save latency"""
+    engine = GameEngine(player.age, seed=seed)
+    tips = {}
+    for _ in range(moves):
+        started = time.perf_counter()
+        item = player.choose_item(engine)
+        engine.pick(item)
+        if item.index not in tips:
+            tips[item.index] = get_bot_reply(fact_request(item["name"], player.age))
+        basket = player.choose_basket(engine)
+        events = engine.place(basket)
+        is_correct = events[0].kind == SORTED_CORRECTLY
+        get_bot_reply(feedback_request(item["name"], basket["label"], is_correct))
+        latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    write_session_data(build_session_data(engine, "Bench", str(player.age)), data_dir)
+    if save_latencies is not None:
+        save_latencies.append(time.perf_counter() - started)
+    return engine
+
+def measure_session_memory(player_class, age, moves, sessions=50):
+    """Average bytes held per live session (engine state and history)"""
+    engines = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with tempfile.TemporaryDirectory() as data_dir:
+        for seed in range(sessions):
+            engines.append(play_session(player_class(age, seed), moves, seed, data_dir, []))
+        close_session_writer(data_dir)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / sessions
+
+def run_benchmark(player_name, sessions, moves, age, seed=0):
+    """Run `sessions` games for one player type and return a result record"""
+    player_class = PLAYERS[player_name]
+    latencies = []
+    save_latencies = []
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as data_dir:
+        for i in range(sessions):
+            play_session(player_class(age, seed + i), moves, seed + i, data_dir, latencies, save_latencies)
+        # Saves are queued; include writing them out in the total time
+        close_session_writer(data_dir)
+    elapsed = time.perf_counter() - started
+    latencies_ms = np.array(latencies) * 1000
+    save_latencies_ms = np.array(save_latencies) * 1000
+    return {
+        "player": player_name,
+        "age": age,
+        "sessions": sessions,
+        "moves": len(latencies),
+        "elapsed_seconds": elapsed,
+        "moves_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "sessions_per_second": sessions / elapsed if elapsed else 0.0,
+        "move_latency_ms": {
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p95": float(np.percentile(latencies_ms, 95)),
+            "p99": float(np.percentile(latencies_ms, 99)),
+            "max": float(latencies_ms.max()),
+        },
+        "save_latency_ms": {
+            "p50": float(np.percentile(save_latencies_ms, 50)),
+            "p95": float(np.percentile(save_latencies_ms, 95)),
+            "p99": float(np.percentile(save_latencies_ms, 99)),
+        },
+        "bytes_per_session": measure_session_memory(player_class, age, moves),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated-player throughput benchmark")
+    parser.add_argument("--players", nargs="+", default=list(PLAYERS), choices=list(PLAYERS))
+    parser.add_argument("--sessions", type=int, default=100, help="Sessions per player type")
+    parser.add_argument("--moves", type=int, default=60, help="Placements per session")
+    parser.add_argument("--age", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    results = [run_benchmark(name, args.sessions, args.moves, args.age, args.seed) for name in args.players]
+    for result in results:
+        latency = result["move_latency_ms"]
+        print(f"{result['player']:>12}: {result['moves_per_second']:>10.0f} moves/s  "
+              f"p50 {latency['p50']:.3f} ms  p95 {latency['p95']:.3f} ms  p99 {latency['p99']:.3f} ms  "
+              f"{result['bytes_per_session'] / 1024:.1f} KiB/session")
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "settings": vars(args),
+            "bot_cache": get_cache_stats(),
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
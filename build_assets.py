@@ -0,0 +1,36 @@
+"""
+Prebuild the image variants the app serves, so the first page view after a
+deploy reads them from disk instead of encoding them.
+
+Each image is resized for its display width at every screen density in
+IMAGE_DENSITIES and encoded as WebP, plus a 1x PNG for browsers without WebP.
+
+Usage:
+    python build_assets.py --output components/assets
+"""
+import argparse
+import os
+import time
+
+from asset_utils import ASSET_DIR, image_variants
+
+# Images the app shows, with the width they are displayed at
+APP_IMAGES = {
+    "instructions.png": 500,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild resized image variants for the app")
+    parser.add_argument("--output", default=ASSET_DIR, help="Asset folder to write variants to")
+    args = parser.parse_args()
+
+    for path, width in APP_IMAGES.items():
+        started = time.time()
+        variants = image_variants(path, width, args.output)
+        print(f"{path} ({os.path.getsize(path) / 1024:.0f} KiB) at {width}px, "
+              f"built in {time.time() - started:.1f}s:")
+        for filename, data in variants.values():
+            print(f"  {filename}: {len(data) / 1024:.1f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Precompile bot responses for every item in the game catalog.
+
+Walks FOOD_CATEGORIES and ADVANCED_CATEGORIES, generates feedback for every
+(item, basket, correct/incorrect) pair and a fun fact for every item and age,
+and writes a compact, deduplicated artifact that hf_utils loads at startup.
+Responses come from the model backend set by HF_API_URL; requests it fails on
+are left out, so the app asks the backend for them at runtime. --canned builds
+the artifact from the canned responses instead.
+
+Usage:
+    HF_API_URL=... python build_catalog.py --output data/response_catalog.json --workers 16 --variants 3
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from game_utils import FOOD_CATEGORIES, ADVANCED_CATEGORIES
+from hf_client import ModelClientError
+from hf_utils import (
+    feedback_request,
+    fact_request,
+    collect_responses,
+    get_client,
+    encode_catalog_key,
+    RESPONSE_CATALOG_PATH,
+    CATALOG_FORMAT_VERSION
+)
+
+# Ages offered on the welcome page
+CHILD_AGES = [3, 4, 5, 6, 7]
+
+def catalog_requests(ages=CHILD_AGES):
+    """Return every feedback and fun-fact request the game catalog can produce"""
+    categories = {**FOOD_CATEGORIES, **ADVANCED_CATEGORIES}
+    bot_requests = []
+    for category, info in categories.items():
+        for item_name in info["items"]:
+            for basket in categories:
+                bot_requests.append(feedback_request(item_name, basket, basket == category))
+            for age in ages:
+                bot_requests.append(fact_request(item_name, age))
+    return bot_requests
+
+def build_catalog(bot_requests, workers=8, variants=1, canned=False):
+    """
+    Generate responses in parallel and return the compact catalog structure
+    and the cache keys no response could be generated for.
+    """
+    # Requests sharing a cache key only need generating once
+    unique = {}
+    for request in bot_requests:
+        unique.setdefault(request.cache_key(), request)
+
+    def generate(request):
+        try:
+            return collect_responses(request, variants, canned=canned)
+        except ModelClientError as e:
+            print(f"Skipping {request.cache_key()}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        generated = dict(zip(unique.keys(), pool.map(generate, unique.values())))
+    failed = [key for key, responses in generated.items() if not responses]
+
+    # Store every distinct response string once and refer to it by index
+    strings = []
+    string_index = {}
+    entries = {}
+    for key, responses in generated.items():
+        indices = []
+        for response in responses:
+            if response not in string_index:
+                string_index[response] = len(strings)
+                strings.append(response)
+            indices.append(string_index[response])
+        if indices:
+            entries[encode_catalog_key(key)] = indices
+
+    catalog = {
+        "version": CATALOG_FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "source": "canned" if canned else "model",
+        "strings": strings,
+        "entries": entries,
+    }
+    return catalog, failed
+
+def write_catalog(catalog, path):
+    """Write the catalog atomically so a running app never reads a partial file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompile bot responses for the game catalog")
+    parser.add_argument("--output", default=RESPONSE_CATALOG_PATH, help="Path of the catalog artifact")
+    parser.add_argument("--workers", type=int, default=8, help="Number of parallel generation workers")
+    parser.add_argument("--variants", type=int, default=1, help="Distinct responses to keep per request")
+    parser.add_argument("--canned", action="store_true",
+                        help="Build from the canned responses instead of the model backend")
+    args = parser.parse_args()
+    if get_client() is None and not args.canned:
+        parser.error("No model backend configured: set HF_API_URL, or pass --canned to build "
+                     "the catalog from the canned responses")
+
+    started = time.time()
+    bot_requests = catalog_requests()
+    catalog, failed = build_catalog(bot_requests, workers=args.workers, variants=args.variants,
+                                    canned=args.canned)
+    write_catalog(catalog, args.output)
+
+    print(f"Wrote {len(catalog['entries'])} {catalog['source']} entries "
+          f"({len(catalog['strings'])} distinct responses) for {len(bot_requests)} requests "
+          f"to {args.output} in {time.time() - started:.1f}s")
+    if failed:
+        print(f"{len(failed)} requests failed and are left to the backend at runtime")
+
+if __name__ == "__main__":
+    main()
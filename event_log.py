@@ -0,0 +1,144 @@
+import numpy as np
+
+from game_utils import ITEM_NAMES, ITEM_INDEX, ITEM_CATEGORIES, CATEGORY_NAMES, CATEGORY_INDEX
+
+# On-disk format: a 16-byte header followed by each column stored contiguously
+EVENT_LOG_MAGIC = b"SSEV"
+EVENT_LOG_VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u2"), ("reserved", "<u2"), ("count", "<u8")])
+
+# Columns in file order; the float column comes first so every column stays aligned
+COLUMNS = (
+    ("timestamp", np.dtype("<f8")),
+    ("level", np.dtype("<u2")),
+    ("item", np.dtype("<u2")),      # catalog item index
+    ("basket", np.dtype("u1")),     # category index of the basket
+    ("is_correct", np.dtype("?")),
+)
+
+INITIAL_CAPACITY = 64
+
+class EventLog:
+    """
+    Columnar game history: one NumPy array per field, grown by doubling so
+    append is O(1) amortized. Iterating or indexing yields the same dicts as
+    the old list-of-dicts history; to_numpy() and to_dataframe() return views
+    without copying.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._columns = {name: np.empty(capacity, dtype) for name, dtype in COLUMNS}
+        self._size = 0
+        self.readonly = False
+
+    def append(self, level, item, basket, is_correct, timestamp):
+        """Record one placement; item and basket are catalog indices"""
+        if self.readonly:
+            raise ValueError("EventLog is read-only")
+        size = self._size
+        if size == len(self._columns["timestamp"]):
+            self._grow()
+        columns = self._columns
+        columns["timestamp"][size] = timestamp
+        columns["level"][size] = level
+        columns["item"][size] = item
+        columns["basket"][size] = basket
+        columns["is_correct"][size] = is_correct
+        self._size = size + 1
+
+    def _grow(self):
+        # Views handed out earlier keep the old buffers, so they stay valid snapshots
+        for name, column in self._columns.items():
+            grown = np.empty(max(INITIAL_CAPACITY, len(column) * 2), column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def _record(self, i):
+        item = int(self._columns["item"][i])
+        return {
+            "level": int(self._columns["level"][i]),
+            "item": {"type": CATEGORY_NAMES[ITEM_CATEGORIES[item]], "name": ITEM_NAMES[item]},
+            "basket": CATEGORY_NAMES[self._columns["basket"][i]],
+            "is_correct": bool(self._columns["is_correct"][i]),
+            "timestamp": float(self._columns["timestamp"][i])
+        }
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("event index out of range")
+        return self._record(i)
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._record(i)
+
+    def to_records(self):
+        """History as a list of dicts, the format saved in session records"""
+        return list(self)
+
+    def to_numpy(self):
+        """Dict of column name -> NumPy view of the recorded events (no copy)"""
+        return {name: column[:self._size] for name, column in self._columns.items()}
+
+    def to_dataframe(self):
+        """pandas DataFrame over the columns, sharing memory with the log"""
+        import pandas as pd
+        return pd.DataFrame(self.to_numpy(), copy=False)
+
+    def nbytes(self):
+        return sum(column[:self._size].nbytes for column in self._columns.values())
+
+    def to_bytes(self):
+        """Encode the log in the on-disk format"""
+        header = np.array([(EVENT_LOG_MAGIC, EVENT_LOG_VERSION, 0, self._size)], dtype=HEADER_DTYPE)
+        columns = self.to_numpy()
+        return header.tobytes() + b"".join(columns[name].tobytes() for name, _ in COLUMNS)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """Read-only log whose columns are views into buffer (bytes, mmap or np.memmap)"""
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        header = data[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header["magic"] != EVENT_LOG_MAGIC or header["version"] != EVENT_LOG_VERSION:
+            raise ValueError("Not a version 1 event log")
+        size = int(header["count"])
+        log = cls(capacity=0)
+        offset = HEADER_DTYPE.itemsize
+        for name, dtype in COLUMNS:
+            end = offset + size * dtype.itemsize
+            if end > len(data):
+                raise ValueError("Event log is truncated")
+            log._columns[name] = data[offset:end].view(dtype)
+            offset = end
+        log._size = size
+        log.readonly = True
+        return log
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a saved log, memory-mapped by default so columns are paged in on demand"""
+        if mmap:
+            return cls.from_buffer(np.memmap(path, dtype=np.uint8, mode="r"))
+        with open(path, "rb") as f:
+            return cls.from_buffer(f.read())
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a log from the saved list-of-dicts history"""
+        log = cls(capacity=max(INITIAL_CAPACITY, len(records)))
+        for event in records:
+            log.append(event["level"], ITEM_INDEX[event["item"]["name"]],
+                       CATEGORY_INDEX[event["basket"]], event["is_correct"], event["timestamp"])
+        return log
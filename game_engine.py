@@ -0,0 +1,172 @@
+import random
+import time
+from collections import namedtuple
+
+from game_utils import (
+    generate_items_for_level,
+    check_sorting,
+    LevelItems,
+    CATALOG_ITEMS,
+    CATALOG_BASKETS,
+    LEVEL_PLAN_POOL_SIZE
+)
+from event_log import EventLog
+
+# Event kinds returned by GameEngine methods
+LEVEL_STARTED = "level_started"
+ITEM_PICKED = "item_picked"
+SORTED_CORRECTLY = "sorted_correctly"
+SORTED_INCORRECTLY = "sorted_incorrectly"
+LEVEL_COMPLETE = "level_complete"
+
+# Something that happened in the game; item, basket and points are set when relevant
+GameEvent = namedtuple("GameEvent", ["kind", "level", "item", "basket", "points"])
+
+class InvalidMove(ValueError):
+    """Raised for moves the current game state does not allow"""
+
+class GameStats:
+    """Running totals for one game, updated in O(1) on every placement"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.correct = 0
+        self.streak = 0                 # Current run of correct placements
+        self.best_streak = 0
+        self.basket_counts = {}         # basket label -> placements, in first-use order
+        self.category_attempts = {}     # item category -> placements
+        self.category_correct = {}
+        self.level_attempts = {}        # level -> placements
+        self.level_correct = {}
+        self.item_attempts = {}         # item name -> placements
+        self.item_errors = {}
+        self.correct_times = []         # "HH:MM:SS" (UTC) of each correct placement
+
+    def record(self, level, item, basket, is_correct, timestamp):
+        self.attempts += 1
+        self.basket_counts[basket["label"]] = self.basket_counts.get(basket["label"], 0) + 1
+        self.category_attempts[item["type"]] = self.category_attempts.get(item["type"], 0) + 1
+        self.level_attempts[level] = self.level_attempts.get(level, 0) + 1
+        self.item_attempts[item["name"]] = self.item_attempts.get(item["name"], 0) + 1
+        if is_correct:
+            self.correct += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+            self.category_correct[item["type"]] = self.category_correct.get(item["type"], 0) + 1
+            self.level_correct[level] = self.level_correct.get(level, 0) + 1
+            self.correct_times.append(time.strftime("%H:%M:%S", time.gmtime(timestamp)))
+        else:
+            self.streak = 0
+            self.item_errors[item["name"]] = self.item_errors.get(item["name"], 0) + 1
+
+    def accuracy(self):
+        """Percentage of placements that were correct"""
+        return self.correct / max(1, self.attempts) * 100
+
+    def top_baskets(self, n=2):
+        """Labels of the most used baskets, ties in first-use order"""
+        return sorted(self.basket_counts, key=self.basket_counts.get, reverse=True)[:n]
+
+class GameEngine:
+    """
+    Shopping Sorter rules and state for one player, independent of any UI.
+    Moves return lists of GameEvents for a front end to render.
+    """
+
+    def __init__(self, age, level=1, seed=None, clock=time.time, level_seeds=None):
+        self.age = int(age)
+        self.clock = clock
+        # With a seed, every level seed (and so the whole game) is reproducible
+        self._rng = random.Random(seed)
+        # Seeds fixed in advance for specific levels, e.g. to replay a saved game
+        self._planned_seeds = {int(level): seed for level, seed in (level_seeds or {}).items()}
+        self.score = 0
+        self.total_attempts = 0
+        self.history = EventLog()
+        self.stats = GameStats()
+        self.level_seeds = {}
+        self.level = level
+        self.items = LevelItems()
+        self.baskets = []
+        self.selected_item = None
+        self.start_level(level)
+
+    def start_level(self, level, seed=None):
+        """Generate the items and baskets for a level"""
+        if seed is None:
+            seed = self._planned_seeds.get(level)
+        if seed is None:
+            seed = self._rng.randrange(LEVEL_PLAN_POOL_SIZE)
+        self.items, self.baskets = generate_items_for_level(level, self.age, seed)
+        self.level = level
+        self.level_seeds[level] = seed
+        self.selected_item = None
+        return [GameEvent(LEVEL_STARTED, level, None, None, 0)]
+
+    def pick(self, item):
+        """Select an item from the store"""
+        if item not in self.items:
+            raise InvalidMove(f"{item['name']} is not in the store")
+        self.selected_item = item
+        return [GameEvent(ITEM_PICKED, self.level, item, None, 0)]
+
+    def place(self, basket, timestamp=None):
+        """Put the selected item in a basket, advancing the level when it is cleared"""
+        item = self.selected_item
+        if item is None:
+            raise InvalidMove("No item is selected")
+        if basket not in self.baskets:
+            raise InvalidMove(f"{basket['label']} is not a basket in this level")
+
+        is_correct = check_sorting(item, basket)
+        self.total_attempts += 1
+        if timestamp is None:
+            timestamp = self.clock()
+        self.history.append(self.level, item.index, basket.index, is_correct, timestamp)
+        self.stats.record(self.level, item, basket, is_correct, timestamp)
+
+        if not is_correct:
+            # The item stays selected so the child can try another basket
+            return [GameEvent(SORTED_INCORRECTLY, self.level, item, basket, 0)]
+
+        points = max(1, self.level)
+        self.items.remove(item)
+        self.score += points
+        self.selected_item = None
+        events = [GameEvent(SORTED_CORRECTLY, self.level, item, basket, points)]
+
+        if not self.items:
+            events.append(GameEvent(LEVEL_COMPLETE, self.level, None, None, 0))
+            events.extend(self.start_level(self.level + 1))
+        return events
+
+    def apply_move(self, item_index, basket_index, timestamp=None):
+        """
+        Apply a pick-and-place made in the browser, by catalog indices.
+        The placement is checked and scored here like any other move.
+        """
+        if not 0 <= item_index < len(CATALOG_ITEMS) or not 0 <= basket_index < len(CATALOG_BASKETS):
+            raise InvalidMove("Unknown item or basket")
+        item = CATALOG_ITEMS[item_index]
+        if self.selected_item != item:
+            self.pick(item)
+        return self.place(CATALOG_BASKETS[basket_index], timestamp)
+
+def replay(history, age, level_seeds):
+    """
+    Rebuild a finished game from its EventLog and level seeds.
+    Raises InvalidMove if the history does not match the levels the seeds produce.
+    """
+    columns = history.to_numpy()
+    timestamps = iter(columns["timestamp"].tolist())
+    engine = GameEngine(age, level=int(columns["level"][0]) if len(history) else 1,
+                        clock=lambda: next(timestamps), level_seeds=level_seeds)
+    for level, item, basket in zip(columns["level"].tolist(), columns["item"].tolist(),
+                                   columns["basket"].tolist()):
+        if level != engine.level:
+            raise InvalidMove(f"History is at level {level} but the game is at level {engine.level}")
+        item = CATALOG_ITEMS[item]
+        if engine.selected_item != item:
+            engine.pick(item)
+        engine.place(CATALOG_BASKETS[basket])
+    return engine
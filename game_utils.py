@@ -1,11 +1,13 @@
 import streamlit as st
 import random
-import uuid
 import emoji
-import time
 from datetime import datetime
-import os
-import json
+from array import array
+from collections import namedtuple
+from collections.abc import Mapping
+from functools import lru_cache
+
+from session_store import new_session_id, get_session_writer, SESSION_DIR
 
 # Food categories and items for the game
 FOOD_CATEGORIES = {
@@ -55,6 +57,142 @@ ADVANCED_CATEGORIES = {
     }
 }
 
+# Every catalog category and item is interned once as an index. Items and
+# baskets in a level are shared, slot-only records that refer to these tables.
+_ALL_CATEGORIES = {**FOOD_CATEGORIES, **ADVANCED_CATEGORIES}
+CATEGORY_NAMES = tuple(_ALL_CATEGORIES)
+CATEGORY_EMOJIS = tuple(_ALL_CATEGORIES[name]["emoji"] for name in CATEGORY_NAMES)
+CATEGORY_INDEX = {name: i for i, name in enumerate(CATEGORY_NAMES)}
+ITEM_NAMES = tuple(item_name for name in CATEGORY_NAMES for item_name in _ALL_CATEGORIES[name]["items"])
+ITEM_CATEGORIES = array("B", [CATEGORY_INDEX[name]
+                              for name in CATEGORY_NAMES
+                              for _ in _ALL_CATEGORIES[name]["items"]])
+ITEM_INDEX = {item_name: i for i, item_name in enumerate(ITEM_NAMES)}
+CATEGORY_ITEMS = tuple(tuple(i for i, category in enumerate(ITEM_CATEGORIES) if category == c)
+                       for c in range(len(CATEGORY_NAMES)))
+
+class Item(Mapping):
+    """A catalog item, readable like the old {"id", "name", "type"} dict"""
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == "name":
+            return ITEM_NAMES[self.index]
+        if key == "type":
+            return CATEGORY_NAMES[ITEM_CATEGORIES[self.index]]
+        if key == "id":
+            return f"item_{self.index}"
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(("id", "name", "type"))
+
+    def __len__(self):
+        return 3
+
+    def __eq__(self, other):
+        if isinstance(other, Item):
+            return self.index == other.index
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return self.index
+
+    def __repr__(self):
+        return f"Item({ITEM_NAMES[self.index]!r})"
+
+    def __reduce__(self):
+        return (catalog_item, (self.index,))
+
+class Basket(Mapping):
+    """A category basket, readable like the old {"id", "label", "emoji"} dict"""
+    __slots__ = ("index",)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == "label":
+            return CATEGORY_NAMES[self.index]
+        if key == "emoji":
+            return CATEGORY_EMOJIS[self.index]
+        if key == "id":
+            return f"basket_{self.index}"
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(("id", "label", "emoji"))
+
+    def __len__(self):
+        return 3
+
+    def __eq__(self, other):
+        if isinstance(other, Basket):
+            return self.index == other.index
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return self.index
+
+    def __repr__(self):
+        return f"Basket({CATEGORY_NAMES[self.index]!r})"
+
+    def __reduce__(self):
+        return (catalog_basket, (self.index,))
+
+CATALOG_ITEMS = tuple(Item(i) for i in range(len(ITEM_NAMES)))
+CATALOG_BASKETS = tuple(Basket(i) for i in range(len(CATEGORY_NAMES)))
+
+def catalog_item(index):
+    """Return the shared Item for a catalog index"""
+    return CATALOG_ITEMS[index]
+
+def catalog_basket(index):
+    """Return the shared Basket for a category index"""
+    return CATALOG_BASKETS[index]
+
+class LevelItems:
+    """
+    Items left to sort in a level: catalog indices in display order plus a
+    bitmask of the ones not yet sorted. Removing an item is a single bit
+    clear, and the whole level pickles to a few dozen bytes.
+    """
+    __slots__ = ("order", "remaining")
+
+    def __init__(self, indices=()):
+        self.order = array("H", indices)
+        self.remaining = 0
+        for index in self.order:
+            self.remaining |= 1 << index
+
+    def __len__(self):
+        return bin(self.remaining).count("1")
+
+    def __bool__(self):
+        return self.remaining != 0
+
+    def __iter__(self):
+        remaining = self.remaining
+        for index in self.order:
+            if remaining >> index & 1:
+                yield CATALOG_ITEMS[index]
+
+    def __getitem__(self, position):
+        return list(self)[position]
+
+    def __contains__(self, item):
+        return isinstance(item, Item) and bool(self.remaining >> item.index & 1)
+
+    def remove(self, item):
+        """Mark an item as sorted"""
+        self.remaining &= ~(1 << item.index)
+
+    def __repr__(self):
+        return f"LevelItems({list(self)!r})"
+
 def init_session_state():
     """Initialize session state variables if they don't exist"""
     if 'page' not in st.session_state:
@@ -66,23 +204,9 @@ def init_session_state():
     if 'child_age' not in st.session_state:
         st.session_state.child_age = '5'
         
-    if 'score' not in st.session_state:
-        st.session_state.score = 0
-        
-    if 'current_level' not in st.session_state:
-        st.session_state.current_level = 1
-        
-    if 'total_attempts' not in st.session_state:
-        st.session_state.total_attempts = 0
-        
-    if 'current_items' not in st.session_state:
-        st.session_state.current_items = []
-        
-    if 'current_baskets' not in st.session_state:
-        st.session_state.current_baskets = []
-        
-    if 'selected_item' not in st.session_state:
-        st.session_state.selected_item = None
+    # Game state (score, level, items, history) lives in a GameEngine
+    if 'engine' not in st.session_state:
+        st.session_state.engine = None
         
     if 'feedback' not in st.session_state:
         st.session_state.feedback = ''
@@ -90,72 +214,95 @@ def init_session_state():
     if 'feedback_type' not in st.session_state:
         st.session_state.feedback_type = ''
         
-    if 'game_history' not in st.session_state:
-        st.session_state.game_history = []
+    if 'level_prefetch' not in st.session_state:
+        st.session_state.level_prefetch = None
+        
+    if 'learning_tips' not in st.session_state:
+        st.session_state.learning_tips = {}
+        
+    # Backend calls made for the current item selection, and per finished selection
+    if 'selection_bot_calls' not in st.session_state:
+        st.session_state.selection_bot_calls = 0
+        
+    if 'bot_call_log' not in st.session_state:
+        st.session_state.bot_call_log = []
+        
+    # Batches of moves received from the browser sort board
+    if 'board_syncs' not in st.session_state:
+        st.session_state.board_syncs = 0
 
-def generate_items_for_level(level, age):
-    """Generate items and baskets for a given level"""
+# Number of precomputed level plans per (level, age bucket) that unseeded games draw from
+LEVEL_PLAN_POOL_SIZE = 256
+
+# A reproducible level: category and item catalog indices, items in display order
+LevelPlan = namedtuple("LevelPlan", ["level", "age_bucket", "seed", "categories", "items"])
+
+def age_bucket(age):
+    """Group ages that get identical levels (the rules only distinguish under 5)"""
+    return "under5" if age < 5 else "5plus"
+
+def level_difficulty(level, bucket):
+    """Return (num_categories, items_per_category, num_available_categories) for a level"""
     # Scale difficulty based on level and age
     num_categories = min(3 + (level // 2), 5)  # Start with 3 categories, add more at higher levels
     items_per_category = min(2 + level, 5)     # Start with 2 items per category, increase with level
     
     # Reduce complexity for younger children
-    if age < 5:
+    if bucket == "under5":
         num_categories = min(num_categories, 3)
         items_per_category = min(items_per_category, 3)
     
-    # Select categories
-    available_categories = list(FOOD_CATEGORIES.keys())
-    
     # Add advanced categories for higher levels and older children
-    if level >= 3 and age >= 5:
-        available_categories.extend(list(ADVANCED_CATEGORIES.keys()))
+    num_available = len(FOOD_CATEGORIES)
+    if level >= 3 and bucket == "5plus":
+        num_available = len(CATEGORY_NAMES)
+    
+    return num_categories, items_per_category, num_available
+
+@lru_cache(maxsize=8192)
+def plan_level(level, bucket, seed):
+    """Build the level plan for (level, age bucket, seed); the same key always gives the same level"""
+    num_categories, items_per_category, num_available = level_difficulty(level, bucket)
+    rng = random.Random(f"{level}:{bucket}:{seed}")
     
     # Randomly select categories for this level
-    random.shuffle(available_categories)
+    available_categories = list(range(num_available))
+    rng.shuffle(available_categories)
     selected_categories = available_categories[:num_categories]
     
-    # Create baskets
-    baskets = []
-    for category in selected_categories:
-        # Get the right category dictionary
-        if category in FOOD_CATEGORIES:
-            cat_dict = FOOD_CATEGORIES
-        else:
-            cat_dict = ADVANCED_CATEGORIES
-            
-        basket = {
-            "id": f"basket_{uuid.uuid4()}",
-            "label": category,
-            "emoji": cat_dict[category]["emoji"]
-        }
-        baskets.append(basket)
-    
-    # Create items
+    # Get a random selection of items from each category
     items = []
     for category in selected_categories:
-        # Get the right category dictionary
-        if category in FOOD_CATEGORIES:
-            cat_dict = FOOD_CATEGORIES
-        else:
-            cat_dict = ADVANCED_CATEGORIES
-            
-        # Get a random selection of items from this category
-        category_items = random.sample(cat_dict[category]["items"], 
-                                      min(items_per_category, len(cat_dict[category]["items"])))
-        
-        for item_name in category_items:
-            item = {
-                "id": f"item_{uuid.uuid4()}",
-                "name": item_name,
-                "type": category
-            }
-            items.append(item)
+        category_items = CATEGORY_ITEMS[category]
+        items.extend(rng.sample(category_items, min(items_per_category, len(category_items))))
     
     # Shuffle items
-    random.shuffle(items)
+    rng.shuffle(items)
     
-    return items, baskets
+    return LevelPlan(level, bucket, seed, tuple(selected_categories), tuple(items))
+
+def warm_level_plans(max_level=10, pool_size=LEVEL_PLAN_POOL_SIZE):
+    """Precompute the plan pools for levels 1..max_level and both age buckets"""
+    for level in range(1, max_level + 1):
+        for bucket in ("under5", "5plus"):
+            for seed in range(pool_size):
+                plan_level(level, bucket, seed)
+
+def random_level_seed():
+    """Pick a seed from the precomputed plan pool"""
+    return random.randrange(LEVEL_PLAN_POOL_SIZE)
+
+def generate_items_for_level(level, age, seed=None):
+    """
+    Generate items and baskets for a given level.
+    The same (level, age bucket, seed) always gives the same level; without
+    a seed a plan is drawn from the precomputed pool.
+    """
+    if seed is None:
+        seed = random_level_seed()
+    plan = plan_level(level, age_bucket(age), seed)
+    baskets = [CATALOG_BASKETS[category] for category in plan.categories]
+    return LevelItems(plan.items), baskets
 
 def check_sorting(item, basket):
     """Check if an item is correctly sorted into a basket"""
@@ -168,90 +315,131 @@ def get_feedback(is_correct, item, basket):
     else:
         return f"Not quite! Try another basket for {item['name']}. 🤔"
 
-def save_session_data():
-    """Save session data to a file"""
-    data = {
-        "child_name": st.session_state.child_name,
-        "child_age": st.session_state.child_age,
-        "score": st.session_state.score,
-        "highest_level": st.session_state.current_level,
-        "total_attempts": st.session_state.total_attempts,
-        "game_history": st.session_state.game_history,
+def build_session_data(engine, child_name, child_age, bot_call_log=()):
+    """Build the saved-session record for a finished game"""
+    return {
+        "session_id": new_session_id(),
+        "child_name": child_name,
+        "child_age": child_age,
+        "score": engine.score,
+        "highest_level": engine.level,
+        "total_attempts": engine.total_attempts,
+        "game_history": engine.history.to_records(),
+        # Seed used for each level, so a game can be replayed exactly
+        "level_seeds": dict(engine.level_seeds),
+        "bot_call_log": list(bot_call_log),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    
-    # Create data directory if it doesn't exist
-    os.makedirs("data", exist_ok=True)
-    
-    # Generate a filename with timestamp
-    filename = f"data/game_session_{int(time.time())}.json"
-    
-    # Save to file
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
-    
-    return filename
+
+def write_session_data(data, directory=SESSION_DIR):
+    """Queue a saved-session record for the background writer and return its session id"""
+    return get_session_writer(directory).submit(data)
+
+def save_session_data():
+    """Save session data and return its session id"""
+    data = build_session_data(
+        st.session_state.engine,
+        st.session_state.child_name,
+        st.session_state.child_age,
+        st.session_state.bot_call_log
+    )
+    return write_session_data(data)
+
+# Hand-picked emojis for items, preferred over name-based lookups
+ITEM_EMOJIS = {
+    "apple": "🍎",
+    "banana": "🍌",
+    "orange": "🍊",
+    "grapes": "🍇",
+    "strawberry": "🍓",
+    "watermelon": "🍉",
+    "pineapple": "🍍",
+    "mango": "🥭",
+    "blueberries": "🫐",
+    "peach": "🍑",
+    "pear": "🍐",
+    "kiwi": "🥝",
+    "carrot": "🥕",
+    "broccoli": "🥦",
+    "tomato": "🍅",
+    "cucumber": "🥒",
+    "potato": "🥔",
+    "corn": "🌽",
+    "onion": "🧅",
+    "milk": "🥛",
+    "cheese": "🧀",
+    "ice cream": "🍦",
+    "bread": "🍞",
+    "rice": "🍚",
+    "pasta": "🍝",
+    "pancake": "🥞",
+    "waffle": "🧇",
+    "chicken": "🍗",
+    "eggs": "🥚",
+    "fish": "🐟",
+    "candy": "🍬",
+    "chocolate": "🍫",
+    "cake": "🎂",
+    "cookies": "🍪",
+    "donut": "🍩",
+    "cupcake": "🧁",
+    "water": "💧",
+    "juice": "🧃",
+    "soda": "🥤",
+    "coffee": "☕",
+    "popcorn": "🍿",
+    "chips": "🍟",
+}
+
+# Emoji shown when neither the item nor its category has one
+DEFAULT_ITEM_EMOJI = "🍽️"
+
+def _lookup_emoji_by_name(item_name):
+    """Resolve an item name to an emoji through the emoji package's names, or None"""
+    name = item_name.lower().replace(" ", "_")
+    candidates = [name]
+    if name.endswith("ies"):
+        candidates.append(name[:-3] + "y")
+    elif name.endswith("s"):
+        candidates.append(name[:-1])
+    for candidate in candidates:
+        for language in ("alias", "en"):
+            shortcode = f":{candidate}:"
+            resolved = emoji.emojize(shortcode, language=language)
+            if resolved != shortcode:
+                return resolved
+    return None
+
+def _build_emoji_index():
+    """Map every catalog item name (as written and lowercased) to its emoji"""
+    index = {}
+    for categories in (FOOD_CATEGORIES, ADVANCED_CATEGORIES):
+        for category in categories.values():
+            for item_name in category["items"]:
+                item_emoji = (ITEM_EMOJIS.get(item_name.lower())
+                              or _lookup_emoji_by_name(item_name)
+                              or category["emoji"])
+                index[item_name] = item_emoji
+                index[item_name.lower()] = item_emoji
+    return index
+
+# Built once at import; get_emoji_for_item is a single dict lookup for catalog items
+EMOJI_INDEX = _build_emoji_index()
 
 def get_emoji_for_item(item_type, item_name):
     """Get the appropriate emoji for an item"""
-    # Try to find a direct emoji match for the item
-    item_lower = item_name.lower()
+    item_emoji = EMOJI_INDEX.get(item_name)
+    if item_emoji is not None:
+        return item_emoji
     
-    # Common emoji mappings
-    emoji_map = {
-        "apple": "🍎",
-        "banana": "🍌",
-        "orange": "🍊",
-        "grapes": "🍇",
-        "strawberry": "🍓",
-        "watermelon": "🍉",
-        "pineapple": "🍍",
-        "mango": "🥭",
-        "blueberries": "🫐",
-        "peach": "🍑",
-        "pear": "🍐",
-        "kiwi": "🥝",
-        "carrot": "🥕",
-        "broccoli": "🥦",
-        "tomato": "🍅",
-        "cucumber": "🥒",
-        "potato": "🥔",
-        "corn": "🌽",
-        "onion": "🧅",
-        "milk": "🥛",
-        "cheese": "🧀",
-        "ice cream": "🍦",
-        "bread": "🍞",
-        "rice": "🍚",
-        "pasta": "🍝",
-        "pancake": "🥞",
-        "waffle": "🧇",
-        "chicken": "🍗",
-        "eggs": "🥚",
-        "fish": "🐟",
-        "candy": "🍬",
-        "chocolate": "🍫",
-        "cake": "🎂",
-        "cookies": "🍪",
-        "donut": "🍩",
-        "cupcake": "🧁",
-        "water": "💧",
-        "juice": "🧃",
-        "soda": "🥤",
-        "coffee": "☕",
-        "popcorn": "🍿",
-        "chips": "🍟",
-    }
-    
-    # Return specific emoji if we have one
-    if item_lower in emoji_map:
-        return emoji_map[item_lower]
-    
-    # Otherwise use the category emoji
+    # Items outside the catalog: hand-picked emoji, then the category emoji
+    item_lower = item_name.lower()
+    if item_lower in ITEM_EMOJIS:
+        return ITEM_EMOJIS[item_lower]
     if item_type in FOOD_CATEGORIES:
         return FOOD_CATEGORIES[item_type]["emoji"]
     elif item_type in ADVANCED_CATEGORIES:
         return ADVANCED_CATEGORIES[item_type]["emoji"]
     
     # Default emoji if all else fails
-    return "🍽️"
\ No newline at end of file
+    return DEFAULT_ITEM_EMOJI
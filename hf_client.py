@@ -0,0 +1,311 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Client defaults
+DEFAULT_TIMEOUT_SECONDS = 2.0       # Per-attempt socket timeout
+DEFAULT_MAX_RETRIES = 2             # Retries after the first attempt
+DEFAULT_POOL_SIZE = 16              # Keep-alive connections per host
+BACKOFF_BASE_SECONDS = 0.1
+BACKOFF_MAX_SECONDS = 1.0
+HEDGE_QUANTILE = 0.95               # Hedge once an attempt is slower than this quantile
+HEDGE_MIN_DELAY_SECONDS = 0.05
+LATENCY_WINDOW = 200                # Number of recent latencies kept for percentiles
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Circuit breaker defaults
+BREAKER_WINDOW = 50                 # Number of recent calls used to judge health
+BREAKER_MIN_CALLS = 10              # Calls needed in the window before tripping
+BREAKER_FAILURE_RATE = 0.5          # Trip when this share of calls fails or is slow
+BREAKER_SLOW_CALL_SECONDS = 1.5     # Calls slower than this count as unhealthy
+BREAKER_COOLDOWN_SECONDS = 15.0     # Wait between background recovery probes
+
+class ModelClientError(Exception):
+    """Raised when the model backend cannot produce a response within the budget"""
+
+class LatencyTracker:
+    """Rolling window of request latencies with percentile lookups"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, quantile, default=None):
+        """Return the given quantile (0-1) of recent latencies, or default if empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return default
+        index = min(len(samples) - 1, int(quantile * len(samples)))
+        return samples[index]
+
+    def __len__(self):
+        return len(self._samples)
+
+class ModelClient:
+    """
+    Pooled HTTP client for a text-generation endpoint.
+    Every call has a deadline; failed attempts are retried with jittered
+    backoff, and a slow attempt can be hedged with a second request.
+    """
+
+    def __init__(self, url, token=None, timeout=DEFAULT_TIMEOUT_SECONDS,
+                 max_retries=DEFAULT_MAX_RETRIES, pool_size=DEFAULT_POOL_SIZE,
+                 hedge=True, hedge_quantile=HEDGE_QUANTILE):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.latency = LatencyTracker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+        # Hedged calls run the primary and backup attempts side by side
+        self._executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="model-client")
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0,
+                      "hedge_wins": 0, "failures": 0, "deadline_exceeded": 0}
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def hedge_delay(self):
+        """Delay before a hedged second request, based on recent latencies"""
+        return max(HEDGE_MIN_DELAY_SECONDS,
+                   self.latency.percentile(self.hedge_quantile, default=self.timeout / 2))
+
+    def _post(self, prompt, timeout):
+        """Send one request and return the generated text"""
+        started = time.monotonic()
+        self._count("attempts")
+        response = self.session.post(self.url, json={"inputs": prompt}, timeout=timeout)
+        if response.status_code in RETRY_STATUS_CODES:
+            raise ModelClientError(f"Model backend returned {response.status_code}")
+        response.raise_for_status()
+        self.latency.record(time.monotonic() - started)
+        return parse_generated_text(response.json(), prompt)
+
+    def _attempt(self, prompt, deadline, hedge):
+        """Run one (possibly hedged) attempt, returning text or raising"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ModelClientError("Latency budget exhausted")
+        timeout = min(self.timeout, remaining)
+        if not hedge:
+            return self._post(prompt, timeout)
+
+        primary = self._executor.submit(self._post, prompt, timeout)
+        done, _ = wait([primary], timeout=min(self.hedge_delay(), remaining))
+        if done:
+            return primary.result()
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            primary.cancel()
+            raise ModelClientError("Latency budget exhausted")
+        self._count("hedges")
+        backup = self._executor.submit(self._post, prompt, min(self.timeout, remaining))
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        raise error or ModelClientError("Latency budget exhausted")
+
+    def generate(self, prompt, budget=None, max_retries=None, hedge=None):
+        """
+        Generate text for a prompt within budget seconds.
+        Raises ModelClientError when every attempt fails or the budget runs out.
+        """
+        self._count("calls")
+        max_retries = self.max_retries if max_retries is None else max_retries
+        hedge = self.hedge if hedge is None else hedge
+        budget = self.timeout * (max_retries + 1) if budget is None else budget
+        deadline = time.monotonic() + budget
+        error = None
+        for attempt in range(max_retries + 1):
+            if attempt:
+                self._count("retries")
+                # Full jitter backoff, never sleeping past the deadline
+                backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                if time.monotonic() + backoff >= deadline:
+                    break
+                time.sleep(backoff)
+            try:
+                return self._attempt(prompt, deadline, hedge)
+            except (requests.RequestException, ModelClientError, ValueError) as e:
+                error = e
+            if time.monotonic() >= deadline:
+                break
+        if time.monotonic() >= deadline:
+            self._count("deadline_exceeded")
+        self._count("failures")
+        raise ModelClientError(f"No response from model backend: {error}")
+
+    def get_stats(self):
+        """Return call counters and latency percentiles"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["p50"] = self.latency.percentile(0.50)
+        stats["p95"] = self.latency.percentile(0.95)
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+def parse_generated_text(payload, prompt=""):
+    """Extract generated text from a Hugging Face style response payload"""
+    if isinstance(payload, list):
+        payload = payload[0] if payload else {}
+    if isinstance(payload, dict):
+        if "error" in payload:
+            raise ModelClientError(payload["error"])
+        text = payload.get("generated_text", "")
+    else:
+        text = str(payload)
+    # Causal models echo the prompt before the continuation
+    if prompt and text.startswith(prompt):
+        text = text[len(prompt):]
+    text = text.strip()
+    if not text:
+        raise ModelClientError("Model backend returned an empty response")
+    return text
+
+class CircuitBreaker:
+    """
+    Tracks backend health and stops sending traffic while it is unhealthy.
+    Failed or slow calls trip the breaker; while open, a background thread
+    probes the backend and closes the breaker once a probe succeeds, so no
+    user request ever waits on a broken backend.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, probe=None, window=BREAKER_WINDOW, min_calls=BREAKER_MIN_CALLS,
+                 failure_rate=BREAKER_FAILURE_RATE, slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+                 cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.probe = probe
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)  # (healthy, latency) pairs
+        self.latency = LatencyTracker(window)
+        self._lock = threading.Lock()
+        self.opened_at = None
+        self.trips = 0
+        self.short_circuited = 0
+        self.probes = 0
+        self.last_error = None
+        self._closed = threading.Event()
+
+    def allow_request(self):
+        """Return True if a call may go to the backend"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self, latency):
+        self.latency.record(latency)
+        self._record(latency <= self.slow_call_seconds, latency)
+
+    def record_failure(self, latency=None, error=None):
+        if latency is not None:
+            self.latency.record(latency)
+        self.last_error = str(error) if error is not None else self.last_error
+        self._record(False, latency)
+
+    def _record(self, healthy, latency):
+        with self._lock:
+            if self.state != self.CLOSED:
+                return
+            self._outcomes.append((healthy, latency))
+            if len(self._outcomes) < self.min_calls:
+                return
+            unhealthy = sum(1 for ok, _ in self._outcomes if not ok)
+            if unhealthy / len(self._outcomes) < self.failure_rate:
+                return
+            self.state = self.OPEN
+            self.opened_at = time.time()
+            self.trips += 1
+        threading.Thread(target=self._probe_until_healthy, name="breaker-probe", daemon=True).start()
+
+    def _probe_until_healthy(self):
+        # Event.wait doubles as the cooldown sleep and returns True once closed
+        while not self._closed.wait(self.cooldown):
+            with self._lock:
+                self.state = self.HALF_OPEN
+                self.probes += 1
+            try:
+                if self.probe is not None:
+                    self.probe()
+            except Exception as e:
+                self.last_error = str(e)
+                with self._lock:
+                    self.state = self.OPEN
+                continue
+            self.reset()
+            return
+
+    def close(self):
+        """Stop any background recovery probes, e.g. when the client is replaced"""
+        self._closed.set()
+
+    def reset(self):
+        """Close the breaker and forget past outcomes"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.opened_at = None
+            self._outcomes.clear()
+
+    def snapshot(self):
+        """Return the breaker state and health metrics for monitoring"""
+        with self._lock:
+            outcomes = list(self._outcomes)
+            snapshot = {
+                "state": self.state,
+                "opened_at": self.opened_at,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited,
+                "probes": self.probes,
+                "last_error": self.last_error,
+            }
+        snapshot["window_calls"] = len(outcomes)
+        snapshot["failure_rate"] = (sum(1 for ok, _ in outcomes if not ok) / len(outcomes)
+                                    if outcomes else 0.0)
+        snapshot["p50"] = self.latency.percentile(0.50)
+        snapshot["p95"] = self.latency.percentile(0.95)
+        snapshot["p99"] = self.latency.percentile(0.99)
+        return snapshot
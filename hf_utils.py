@@ -1,6 +1,15 @@
 import requests
+import os
+import json
 import time
 import random
+import re
+import threading
+import itertools
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from hf_client import ModelClient, ModelClientError, CircuitBreaker
 
 # Fallback responses in case the API is unavailable
 FALLBACK_POSITIVE_FEEDBACK = [
@@ -42,45 +51,594 @@ FALLBACK_FUN_FACTS = {
     "Strawberry": "Strawberries wear their seeds on the outside! 🍓",
 }
 
-def get_bot_response(prompt, max_retries=2):
+# Generic fact used when no item in the index matches
+GENERIC_FUN_FACT = "Did you know foods give us energy to play and grow? 🌱"
+
+def _fact_tokens(name):
+    """Split an item name into normalized, singular word tokens"""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", str(name).lower()):
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 4 and word.endswith("oes"):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+class FunFactIndex:
+    """Hash index from normalized item names to their fun facts.
+
+    Item names are matched exactly first, then by their longest run of
+    consecutive words ("Cottage Cheese" prefers a "Cottage Cheese" fact over
+    a "Cheese" one). Lookup cost depends on the length of the item name only,
+    not on the number of facts. Items with several facts rotate through them.
+    """
+
+    def __init__(self, facts):
+        self._facts = {}
+        for name, item_facts in facts.items():
+            if isinstance(item_facts, str):
+                item_facts = [item_facts]
+            key = " ".join(_fact_tokens(name))
+            if key and item_facts:
+                self._facts.setdefault(key, []).extend(item_facts)
+        self._facts = {key: tuple(item_facts) for key, item_facts in self._facts.items()}
+        self._rotation = {key: itertools.count() for key, item_facts in self._facts.items()
+                          if len(item_facts) > 1}
+        self.max_words = max((key.count(" ") + 1 for key in self._facts), default=0)
+
+    def __len__(self):
+        return len(self._facts)
+
+    def _match(self, tokens):
+        if not tokens:
+            return None
+        key = " ".join(tokens)
+        if key in self._facts:
+            return key
+        # Longest consecutive run of words first, leftmost first for ties
+        for size in range(min(len(tokens) - 1, self.max_words), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                key = " ".join(tokens[start:start + size])
+                if key in self._facts:
+                    return key
+        return None
+
+    def rotates(self, item_name):
+        """Return True if item_name matches an entry with several facts"""
+        return self._match(_fact_tokens(item_name)) in self._rotation
+
+    def lookup(self, item_name, default=None):
+        """Return a fun fact for item_name, rotating when it has several"""
+        key = self._match(_fact_tokens(item_name))
+        if key is None:
+            return default
+        item_facts = self._facts[key]
+        if len(item_facts) == 1:
+            return item_facts[0]
+        return item_facts[next(self._rotation[key]) % len(item_facts)]
+
+_fact_index = FunFactIndex(FALLBACK_FUN_FACTS)
+
+def load_fun_facts(facts, replace=False):
+    """Add an item -> fact(s) mapping to the fun-fact index (e.g. a full catalog)"""
+    global _fact_index
+    if not replace:
+        merged = {name: list(item_facts) if not isinstance(item_facts, str) else [item_facts]
+                  for name, item_facts in FALLBACK_FUN_FACTS.items()}
+        for name, item_facts in facts.items():
+            merged.setdefault(name, []).extend([item_facts] if isinstance(item_facts, str) else item_facts)
+        facts = merged
+    _fact_index = FunFactIndex(facts)
+    # Cached fun facts may come from the old index
+    _response_cache.clear()
+    return len(_fact_index)
+
+# Response cache settings (shared by every Streamlit session in this process)
+CACHE_MAX_SIZE = 4096
+CACHE_TTL_SECONDS = 6 * 60 * 60
+CACHE_EVICTION = "lru"  # "lru" or "fifo"
+# Number of distinct responses kept per feedback or fun-fact key. 1 means every child
+# sees the same cached response for a given sort; raise it to opt in to some variety.
+CACHE_FEEDBACK_VARIETY = 1
+
+class ResponseCache:
+    """Thread-safe LRU/TTL cache for bot responses, keyed on normalized requests"""
+
+    VARIED_INTENTS = ("positive", "negative", "fact")
+
+    def __init__(self, max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS,
+                 eviction=CACHE_EVICTION, feedback_variety=CACHE_FEEDBACK_VARIETY):
+        if eviction not in ("lru", "fifo"):
+            raise ValueError(f"Unknown cache eviction policy: {eviction}")
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.eviction = eviction
+        self.feedback_variety = max(1, int(feedback_variety))
+        self._entries = OrderedDict()  # key -> (expires_at, [responses])
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _variety_for(self, key):
+        if key[0] in self.VARIED_INTENTS:
+            return self.feedback_variety
+        return 1
+
+    def get(self, key):
+        """Return a cached response for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            # Feedback keys with variety enabled keep missing until enough variants exist
+            if entry is None or len(entry[1]) < self._variety_for(key):
+                self.misses += 1
+                return None
+            if self.eviction == "lru":
+                self._entries.move_to_end(key)
+            self.hits += 1
+            responses = entry[1]
+            return responses[0] if len(responses) == 1 else random.choice(responses)
+
+    def put(self, key, response):
+        """Store a response for key, evicting the oldest entries when full"""
+        if response is None:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                responses = entry[1]
+                if len(responses) < self._variety_for(key):
+                    responses.append(response)
+                self._entries[key] = (expires_at, responses)
+                if self.eviction == "lru":
+                    self._entries.move_to_end(key)
+                return
+            self._entries[key] = (expires_at, [response])
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+_response_cache = ResponseCache()
+
+def configure_cache(max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS,
+                    eviction=CACHE_EVICTION, feedback_variety=CACHE_FEEDBACK_VARIETY):
+    """Replace the shared response cache with one using the given settings"""
+    global _response_cache
+    _response_cache = ResponseCache(max_size, ttl, eviction, feedback_variety)
+    return _response_cache
+
+def get_cache_stats():
+    """Return statistics for the shared response cache"""
+    return _response_cache.stats()
+
+def _normalize(text):
+    return " ".join(str(text).lower().split())
+
+# Prompt text sent to a real model backend for each request intent
+PROMPT_TEMPLATES = {
+    "positive": "Give a very short, fun, child-friendly positive feedback (max 10 words) for correctly sorting {item} into {basket}. Make it enthusiastic. Include an emoji.",
+    "negative": "Give a short, gentle, encouraging feedback (max 10 words) for a young child incorrectly sorting {item} into {basket}. Make it child-friendly. Include an emoji.",
+    "fact": "Give a simple, fun fact about {item} that a {age} year old child would find interesting. Keep it to one short, simple sentence. Include an emoji.",
+    "summary": "Give a very short, encouraging summary (2-3 sentences) for a {age} year old child named {name} who has been learning about food groups. They worked especially with {categories}. Be positive and encouraging about their learning journey. Make it very child-friendly.",
+}
+
+@dataclass(frozen=True)
+class BotRequest:
+    """A structured request for the bot; the prompt text is only rendered when needed"""
+    intent: str  # "positive", "negative", "fact", "summary" or "generic"
+    item: str = None
+    basket: str = None
+    age: int = None
+    name: str = None
+    categories: tuple = ()
+    text: str = None  # free-text prompt for "generic" requests
+
+    def cache_key(self):
+        """Return the normalized (intent, item, basket, age) key for this request"""
+        if self.intent in ("positive", "negative"):
+            return (self.intent, _normalize(self.item), _normalize(self.basket), None)
+        if self.intent == "fact":
+            return ("fact", _normalize(self.item), None, self.age)
+        if self.intent == "summary":
+            # Names are kept case-sensitive since they appear in the response
+            return ("summary", self.name, ", ".join(_normalize(c) for c in self.categories), self.age)
+        return ("generic", _normalize(self.text or ""), None, None)
+
+    def render_prompt(self):
+        """Render the prompt text for a language model backend"""
+        if self.intent == "generic":
+            return self.text or ""
+        return PROMPT_TEMPLATES[self.intent].format(
+            item=self.item,
+            basket=self.basket,
+            age=self.age,
+            name=self.name,
+            categories=", ".join(self.categories),
+        )
+
+def feedback_request(item_name, basket_label, is_correct):
+    """Build a feedback request for sorting item_name into basket_label"""
+    return BotRequest("positive" if is_correct else "negative", item=item_name, basket=basket_label)
+
+def fact_request(item_name, age):
+    """Build a fun-fact request about item_name for a child of the given age"""
+    return BotRequest("fact", item=item_name, age=int(age))
+
+def summary_request(name, age, categories):
+    """Build an end-of-game learning summary request"""
+    return BotRequest("summary", age=int(age), name=name, categories=tuple(categories))
+
+def parse_prompt(prompt):
+    """Turn a free-text prompt into a BotRequest (compatibility with string prompts)"""
+    text = _normalize(prompt)
+    if "positive feedback" in text or "negative feedback" in text or "incorrect" in text:
+        intent = "positive" if "positive feedback" in text else "negative"
+        match = re.search(r"sorting (.+?) into (.+?)\.", " ".join(prompt.split()))
+        if match:
+            return BotRequest(intent, item=match.group(1), basket=match.group(2))
+        return BotRequest(intent, item=prompt)
+    age = re.search(r"(\d+) year old", text)
+    age = int(age.group(1)) if age else None
+    if "fact about" in text:
+        item = prompt.split("fact about")[1].split("that")[0].strip()
+        return BotRequest("fact", item=item, age=age)
+    if "summary" in text:
+        name = re.search(r"named (.+?) who", " ".join(prompt.split()))
+        categories = re.search(r"worked especially with (.*?)\.", " ".join(prompt.split()))
+        return BotRequest(
+            "summary",
+            age=age,
+            name=name.group(1) if name else "",
+            categories=tuple(c.strip() for c in categories.group(1).split(",") if c.strip()) if categories else (),
+        )
+    return BotRequest("generic", text=prompt)
+
+def _positive_feedback(request):
+    return random.choice(FALLBACK_POSITIVE_FEEDBACK)
+
+def _negative_feedback(request):
+    return random.choice(FALLBACK_NEGATIVE_FEEDBACK)
+
+def _fun_fact(request):
+    return _fact_index.lookup(request.item or "", default=GENERIC_FUN_FACT)
+
+def _learning_summary(request):
+    return f"Great job shopping today, {request.name}! You're learning so much about different foods and where they belong. Keep exploring and learning! 🌟"
+
+def _generic_response(request):
+    return "You're doing great! Keep learning about foods! 🍎🥕🍌"
+
+_HANDLERS = {
+    "positive": _positive_feedback,
+    "negative": _negative_feedback,
+    "fact": _fun_fact,
+    "summary": _learning_summary,
+    "generic": _generic_response,
+}
+
+# Model backend settings. Without HF_API_URL only the canned responses are used.
+HF_API_URL = os.environ.get("HF_API_URL", "")
+HF_API_TOKEN = os.environ.get("HF_API_TOKEN", "")
+LATENCY_BUDGET_SECONDS = 2.5  # Total time one reply may spend on the backend
+
+PROBE_PROMPT = "Say hello to a child who is learning about food. Include an emoji."
+
+def _make_breaker(client):
+    # Recovery probes bypass retries and hedging so they stay cheap
+    return CircuitBreaker(probe=lambda: client.generate(PROBE_PROMPT, budget=client.timeout,
+                                                        max_retries=0, hedge=False))
+
+_model_client = ModelClient(HF_API_URL, HF_API_TOKEN) if HF_API_URL else None
+_breaker = _make_breaker(_model_client) if _model_client is not None else None
+
+def configure_client(url, token=None, **client_options):
+    """Point the bot at a model endpoint (or disable it with url=None)"""
+    global _model_client, _breaker
+    if _breaker is not None:
+        _breaker.close()
+    if _model_client is not None:
+        _model_client.close()
+    _model_client = ModelClient(url, token, **client_options) if url else None
+    _breaker = _make_breaker(_model_client) if _model_client is not None else None
+    return _model_client
+
+def get_client():
+    """Return the shared model client, or None when no backend is configured"""
+    return _model_client
+
+def get_backend_health():
+    """Return circuit breaker state and client metrics for monitoring"""
+    if _model_client is None:
+        return {"state": "disabled"}
+    health = _breaker.snapshot()
+    health["client"] = _model_client.get_stats()
+    return health
+
+# Responses generated (not served from the catalog or a cache) on each thread.
+# Streamlit runs every script rerun on one thread, so this counts per session.
+_generation_counter = threading.local()
+
+def get_generation_count():
+    """Return how many responses have been generated on the calling thread"""
+    return getattr(_generation_counter, "count", 0)
+
+def _generate_response(request, max_retries=2):
     """
-    Try to get a response from a language model API.
-    Falls back to pre-written responses if API fails.
-    
-    This is a simplified version that doesn't actually call an external API
-    to avoid requiring API keys.
+    Try to get a response from the language model backend.
+    Falls back to pre-written responses if no backend is configured,
+    or if it fails or runs out of latency budget.
+    Returns (response, degraded); degraded is True when a configured backend
+    was skipped or failed, so the response is a stand-in for the model's.
     """
+    _generation_counter.count = get_generation_count() + 1
+
+    # An open circuit breaker skips the backend entirely until it recovers
+    if _model_client is not None and _breaker.allow_request():
+        started = time.monotonic()
+        try:
+            response = _model_client.generate(request.render_prompt(),
+                                              budget=LATENCY_BUDGET_SECONDS,
+                                              max_retries=max_retries)
+            _breaker.record_success(time.monotonic() - started)
+            return response, False
+        except ModelClientError as e:
+            _breaker.record_failure(time.monotonic() - started, e)
+            print(f"Model backend unavailable, using fallback response: {e}")
+
+    degraded = _model_client is not None
     try:
-        # In a real implementation, this would call a language model API
-        # Example:
-        # response = requests.post(
-        #     "https://api.huggingface.co/models/gpt2",
-        #     json={"inputs": prompt},
-        #     headers={"Authorization": f"Bearer {API_KEY}"}
-        # )
-        # return response.json()[0]["generated_text"]
-        
-        # For this implementation, we'll just use fallback responses
-        if "positive feedback" in prompt.lower():
-            return random.choice(FALLBACK_POSITIVE_FEEDBACK)
-        elif "negative feedback" in prompt.lower() or "incorrect" in prompt.lower():
-            return random.choice(FALLBACK_NEGATIVE_FEEDBACK)
-        elif "fact about" in prompt.lower():
-            item_name = prompt.split("fact about")[1].split("that")[0].strip()
-            # Try to find a matching fact
-            for food, fact in FALLBACK_FUN_FACTS.items():
-                if food.lower() in item_name.lower():
-                    return fact
-            # Return a generic fact if no match
-            return f"Did you know foods give us energy to play and grow? 🌱"
-        elif "summary" in prompt.lower():
-            name = prompt.split("named")[1].split("who")[0].strip()
-            return f"Great job shopping today, {name}! You're learning so much about different foods and where they belong. Keep exploring and learning! 🌟"
-        else:
-            # Generic response for other prompts
-            return "You're doing great! Keep learning about foods! 🍎🥕🍌"
+        return _HANDLERS[request.intent](request), degraded
             
     except Exception as e:
         # In case of any error, return None
         print(f"Error getting bot response: {e}")
-        return None
\ No newline at end of file
+        return None, degraded
+
+# Precompiled response catalog built by build_catalog.py
+RESPONSE_CATALOG_PATH = os.environ.get("RESPONSE_CATALOG_PATH", "data/response_catalog.json")
+CATALOG_FORMAT_VERSION = 1
+
+def encode_catalog_key(key):
+    """Encode a BotRequest cache key as a catalog string key"""
+    return "\t".join("" if part is None else str(part) for part in key)
+
+def decode_catalog_key(text):
+    """Decode a catalog string key back into a BotRequest cache key"""
+    intent, item, basket, age = text.split("\t")
+    return (intent, item, basket or None, int(age) if age else None)
+
+class ResponseCatalog:
+    """Read-only table of pregenerated responses, keyed like the response cache"""
+
+    def __init__(self, entries):
+        self._entries = entries  # cache key -> tuple of responses
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Return a pregenerated response for key, or None if not covered"""
+        responses = self._entries.get(key)
+        if not responses:
+            return None
+        return responses[0] if len(responses) == 1 else random.choice(responses)
+
+    @classmethod
+    def load(cls, path):
+        """Load a catalog artifact written by build_catalog.py"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CATALOG_FORMAT_VERSION:
+            raise ValueError(f"Unsupported response catalog version: {data.get('version')}")
+        strings = data["strings"]
+        entries = {
+            decode_catalog_key(key): tuple(strings[i] for i in indices)
+            for key, indices in data["entries"].items()
+        }
+        return cls(entries)
+
+def load_response_catalog(path=RESPONSE_CATALOG_PATH):
+    """Load the response catalog at path, replacing the current one"""
+    global _catalog
+    _catalog = ResponseCatalog.load(path) if path and os.path.exists(path) else None
+    return _catalog
+
+_catalog = None
+try:
+    load_response_catalog()
+except (OSError, ValueError, KeyError, IndexError) as e:
+    print(f"Could not load response catalog: {e}")
+
+def collect_responses(request, variants=1, max_retries=2, canned=False):
+    """
+    Generate up to `variants` distinct responses for a request, bypassing the
+    caches and the circuit breaker. Uses the model backend unless canned is
+    True; raises ModelClientError if no backend is configured or it fails
+    before producing any response, never substituting canned text.
+    """
+    if canned:
+        generate = lambda: _HANDLERS[request.intent](request)
+    elif _model_client is None:
+        raise ModelClientError("No model backend configured")
+    else:
+        generate = lambda: _model_client.generate(request.render_prompt(), max_retries=max_retries)
+    responses = []
+    # Allow a few extra attempts since canned and model responses can repeat
+    for _ in range(variants * 3):
+        try:
+            response = generate()
+        except ModelClientError:
+            if responses:
+                break
+            raise
+        if response and response not in responses:
+            responses.append(response)
+        if len(responses) >= variants:
+            break
+    return responses
+
+def get_bot_reply(request, max_retries=2):
+    """
+    Get a child-friendly response for a BotRequest.
+    Served from the precompiled catalog or the shared response cache when
+    possible, so the model is only called for requests neither covers.
+    """
+    key = request.cache_key()
+    if _catalog is not None:
+        response = _catalog.get(key)
+        if response is not None:
+            return response
+    # Canned feedback is a fresh random pick and canned facts for items with
+    # several facts rotate on every call; caching either would freeze them, and
+    # they cost nothing to make, so only model replies go through the cache
+    if _model_client is None and (request.intent in ("positive", "negative") or
+                                  (request.intent == "fact" and _fact_index.rotates(request.item or ""))):
+        return _generate_response(request, max_retries=max_retries)[0]
+    cached = _response_cache.get(key)
+    if cached is not None:
+        return cached
+    response, degraded = _generate_response(request, max_retries=max_retries)
+    # Fallbacks served during an outage are not cached, so the model's replies
+    # come back as soon as the breaker closes
+    if not degraded:
+        _response_cache.put(key, response)
+    return response
+
+def get_bot_response(prompt, max_retries=2):
+    """Get a response for a free-text prompt (compatibility wrapper for get_bot_reply)"""
+    return get_bot_reply(parse_prompt(prompt), max_retries=max_retries)
+
+# Level prefetch settings. When enabled, every feedback and fun fact a level can
+# trigger is requested in the background as soon as the level is generated.
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "0") == "1"
+PREFETCH_WORKERS = 8
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="bot-prefetch")
+_prefetch_lock = threading.Lock()
+_prefetch_totals = {"levels": 0, "prefetched": 0, "hits": 0, "misses": 0, "wasted": 0, "cancelled": 0}
+
+def level_requests(items, baskets, age):
+    """Return every BotRequest a level with these items and baskets can trigger"""
+    requests_for_level = []
+    for item in items:
+        requests_for_level.append(fact_request(item["name"], age))
+        for basket in baskets:
+            requests_for_level.append(
+                feedback_request(item["name"], basket["label"], item["type"] == basket["label"])
+            )
+    return requests_for_level
+
+class LevelPrefetch:
+    """Bot responses for one level, fetched concurrently in the background"""
+
+    def __init__(self, bot_requests):
+        self._futures = {}
+        for request in bot_requests:
+            key = request.cache_key()
+            if key not in self._futures:
+                self._futures[key] = _prefetch_pool.submit(get_bot_reply, request)
+        self._used = set()
+        self.hits = 0
+        self.misses = 0
+        self._finished = False
+
+    def reply(self, request):
+        """Return the prefetched reply for request, falling back to get_bot_reply"""
+        key = request.cache_key()
+        future = self._futures.get(key)
+        if future is None or future.cancelled():
+            self.misses += 1
+            return get_bot_reply(request)
+        if future.cancel():
+            # Still queued behind other prefetches (from every session), so a
+            # direct call is quicker than waiting for a worker
+            self.misses += 1
+            return get_bot_reply(request)
+        self._used.add(key)
+        if future.done():
+            self.hits += 1
+        else:
+            # Already in flight, so waiting for it is never slower than a new call
+            self.misses += 1
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error getting prefetched bot response: {e}")
+            return get_bot_reply(request)
+
+    def stats(self):
+        """
+        Return coverage and waste metrics for this level. Only replies that were
+        generated and never used count as wasted; cancelled requests cost nothing.
+        """
+        prefetched = len(self._futures)
+        lookups = self.hits + self.misses
+        completed = [key for key, future in self._futures.items() if future.done() and not future.cancelled()]
+        wasted = sum(1 for key in completed if key not in self._used)
+        return {
+            "prefetched": prefetched,
+            "completed": len(completed),
+            "cancelled": sum(1 for future in self._futures.values() if future.cancelled()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coverage": self.hits / lookups if lookups else 0.0,
+            "wasted": wasted,
+            "wasted_ratio": wasted / prefetched if prefetched else 0.0,
+        }
+
+    def finish(self):
+        """Cancel outstanding work and add this level's metrics to the process totals"""
+        if self._finished:
+            return
+        self._finished = True
+        for future in self._futures.values():
+            future.cancel()
+        stats = self.stats()
+        with _prefetch_lock:
+            _prefetch_totals["levels"] += 1
+            for name in ("prefetched", "hits", "misses", "wasted", "cancelled"):
+                _prefetch_totals[name] += stats[name]
+
+def prefetch_level(items, baskets, age):
+    """Start prefetching every bot reply a level can trigger"""
+    return LevelPrefetch(level_requests(items, baskets, age))
+
+def get_prefetch_stats():
+    """Return prefetch coverage and waste totals across all finished levels"""
+    with _prefetch_lock:
+        totals = dict(_prefetch_totals)
+    lookups = totals["hits"] + totals["misses"]
+    totals["coverage"] = totals["hits"] / lookups if lookups else 0.0
+    totals["wasted_ratio"] = totals["wasted"] / totals["prefetched"] if totals["prefetched"] else 0.0
+    return totals
@@ -0,0 +1,184 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+# Persistence settings
+SESSION_DIR = os.environ.get("SESSION_DIR", "data")
+SESSION_FSYNC = os.environ.get("SESSION_FSYNC", "batch")  # "always", "batch" or "never"
+FSYNC_POLICIES = ("always", "batch", "never")
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "jsonl")  # "jsonl" or "sqlite"
+WRITER_BATCH_SIZE = 64          # Most records written per batch
+WRITER_FLUSH_SECONDS = 0.25     # Longest a record waits for its batch to fill
+
+_STOP = object()
+
+def new_session_id():
+    """Return a unique id for a saved session"""
+    return uuid.uuid4().hex
+
+def encode_record(record):
+    """Encode a session record as one compact JSON Lines line"""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+class SessionWriter:
+    """
+    Appends session records to JSON Lines files from a background thread.
+    Records are queued by submit() and written in batches, so saving never
+    blocks the caller on disk I/O. Each process appends to its own daily
+    segment file, so concurrent app processes never interleave writes.
+    """
+
+    def __init__(self, directory=SESSION_DIR, fsync=SESSION_FSYNC,
+                 batch_size=WRITER_BATCH_SIZE, flush_seconds=WRITER_FLUSH_SECONDS):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, not {fsync!r}")
+        self.directory = directory
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.stats = {"submitted": 0, "written": 0, "batches": 0, "fsyncs": 0, "bytes": 0, "errors": 0}
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def segment_path(self):
+        """File the writer currently appends to"""
+        day = time.strftime("%Y%m%d")
+        return os.path.join(self.directory, f"sessions_{day}_{os.getpid()}.jsonl")
+
+    def submit(self, record):
+        """Queue a record for writing and return its session id"""
+        record.setdefault("session_id", new_session_id())
+        self.stats["submitted"] += 1
+        self._queue.put(record)
+        return record["session_id"]
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is _STOP:
+                self._queue.task_done()
+                return
+            batch = [record]
+            stop = False
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.segment_path(), "a", encoding="utf-8") as f:
+                for record in batch:
+                    line = encode_record(record)
+                    f.write(line)
+                    self.stats["bytes"] += len(line)
+                    if self.fsync == "always":
+                        f.flush()
+                        os.fsync(f.fileno())
+                        self.stats["fsyncs"] += 1
+                if self.fsync == "batch":
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self.stats["fsyncs"] += 1
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except (OSError, TypeError, ValueError) as e:
+            self.stats["errors"] += len(batch)
+            self.last_error = str(e)
+            print(f"Error saving {len(batch)} sessions: {e}")
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write any queued records and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+# One writer per directory, shared by all sessions in the process
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_session_writer(directory=SESSION_DIR):
+    """Return the shared writer for a directory, starting it if needed"""
+    with _writers_lock:
+        writer = _writers.get(directory)
+        if writer is None:
+            if SESSION_BACKEND == "sqlite":
+                from sqlite_store import SQLiteSessionWriter
+                writer = SQLiteSessionWriter(os.path.join(directory, "sessions.db"))
+            else:
+                writer = SessionWriter(directory)
+            _writers[directory] = writer
+        return writer
+
+def close_session_writer(directory=None):
+    """Flush and stop the writer for a directory, or every writer"""
+    with _writers_lock:
+        directories = list(_writers) if directory is None else [directory]
+        writers = [_writers.pop(d) for d in directories if d in _writers]
+    for writer in writers:
+        writer.close()
+
+atexit.register(close_session_writer)
+
+def session_files(directory=SESSION_DIR):
+    """Saved-session files in a directory: JSON Lines segments in day order, then older JSON files"""
+    return (sorted(glob.glob(os.path.join(directory, "sessions_*.jsonl")))
+            + sorted(glob.glob(os.path.join(directory, "game_session_*.json"))))
+
+def read_session_file(path, start=0, end=None):
+    """
+    Stream the session records in one file.
+    For JSON Lines segments, start and end select a byte range: only records
+    whose line begins inside [start, end) are read, so a file can be split
+    into chunks at any offsets.
+    """
+    if not path.endswith(".jsonl"):
+        try:
+            with open(path, encoding="utf-8") as f:
+                yield json.load(f)
+        except ValueError as e:
+            print(f"Skipping bad session file {path}: {e}")
+        return
+
+    with open(path, "rb") as f:
+        if start:
+            # Skip the rest of a line that began before this chunk
+            f.seek(start - 1)
+            f.readline()
+        while end is None or f.tell() < end:
+            line = f.readline()
+            # A line without a newline is a write cut short by a crash
+            if not line.endswith(b"\n"):
+                break
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                print(f"Skipping bad session record in {path}: {e}")
+
+def read_sessions(directory=SESSION_DIR):
+    """Stream every saved session record in a directory, one at a time"""
+    for path in session_files(directory):
+        yield from read_session_file(path)
@@ -0,0 +1,295 @@
+"""
+SQLite backend for saved sessions.
+
+Sessions and their per-move game_history events are stored in a local
+database in WAL mode, indexed by child, time and level. Accuracy per level
+per day is kept in a rollup table, so reports stay fast as events grow.
+
+Enable it for the app with SESSION_BACKEND=sqlite. Existing saved sessions
+can be imported with:
+    python sqlite_store.py --import-from data --db data/sessions.db
+"""
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from session_store import SessionWriter, SESSION_DIR, SESSION_FSYNC, read_sessions
+
+SESSION_DB_PATH = os.path.join(SESSION_DIR, "sessions.db")
+DB_POOL_SIZE = 4
+
+# PRAGMA synchronous for each SESSION_FSYNC policy; "always" also commits per record
+SYNCHRONOUS_BY_FSYNC = {"always": "FULL", "batch": "FULL", "never": "OFF"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    child_name TEXT NOT NULL,
+    child_age INTEGER,
+    score INTEGER,
+    highest_level INTEGER,
+    total_attempts INTEGER,
+    saved_at REAL NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_child ON sessions (child_name, saved_at);
+CREATE INDEX IF NOT EXISTS sessions_by_time ON sessions (saved_at);
+
+CREATE TABLE IF NOT EXISTS events (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    item_name TEXT,
+    item_type TEXT,
+    basket TEXT,
+    is_correct INTEGER NOT NULL,
+    timestamp REAL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_by_time ON events (timestamp, level, is_correct);
+CREATE INDEX IF NOT EXISTS events_by_level ON events (level, timestamp);
+
+CREATE TABLE IF NOT EXISTS level_daily (
+    day TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (day, level)
+) WITHOUT ROWID;
+"""
+
+def _day(value):
+    """ISO day string for a date, datetime, ISO string or unix timestamp"""
+    if isinstance(value, (int, float)):
+        return date.fromtimestamp(value).isoformat()
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+def _saved_at(record):
+    """Unix time a session record was saved"""
+    try:
+        return datetime.strptime(record["timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+class SQLiteSessionStore:
+    """Session database with a small pool of connections shared across threads"""
+
+    def __init__(self, path=SESSION_DB_PATH, pool_size=DB_POOL_SIZE, fsync=SESSION_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={SYNCHRONOUS_BY_FSYNC[self.fsync]}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def add_sessions(self, records):
+        """Insert session records and their events in one transaction; returns the number added"""
+        added = 0
+        rollup = Counter()
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for record in records:
+                    added += self._insert(conn, record, rollup)
+                conn.executemany(
+                    "INSERT INTO level_daily (day, level, attempts, correct) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (day, level) DO UPDATE SET "
+                    "attempts = attempts + excluded.attempts, correct = correct + excluded.correct",
+                    [(day, level, attempts, correct) for (day, level), (attempts, correct)
+                     in self._rollup_rows(rollup).items()])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    @staticmethod
+    def _rollup_rows(rollup):
+        rows = {}
+        for (day, level, is_correct), count in rollup.items():
+            attempts, correct = rows.get((day, level), (0, 0))
+            rows[(day, level)] = (attempts + count, correct + (count if is_correct else 0))
+        return rows
+
+    def _insert(self, conn, record, rollup):
+        history = record.get("game_history", [])
+        summary = {key: value for key, value in record.items() if key != "game_history"}
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO sessions (session_id, child_name, child_age, score, highest_level, "
+            "total_attempts, saved_at, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (record["session_id"], record.get("child_name", ""), record.get("child_age"),
+             record.get("score"), record.get("highest_level"), record.get("total_attempts"),
+             _saved_at(record), json.dumps(summary, ensure_ascii=False, separators=(",", ":"))))
+        if not cursor.rowcount:
+            # Already stored, e.g. an import run twice
+            return 0
+        conn.executemany(
+            "INSERT INTO events (session_id, seq, level, item_name, item_type, basket, is_correct, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(record["session_id"], seq, move["level"], move["item"]["name"], move["item"]["type"],
+              move["basket"], int(move["is_correct"]), move["timestamp"])
+             for seq, move in enumerate(history)])
+        for move in history:
+            rollup[(_day(move["timestamp"]), move["level"], bool(move["is_correct"]))] += 1
+        return 1
+
+    def sessions_for_child(self, child_name, limit=None):
+        """Session summaries for a child, newest first"""
+        sql = ("SELECT session_id, child_name, child_age, score, highest_level, total_attempts, saved_at "
+               "FROM sessions WHERE child_name = ? ORDER BY saved_at DESC")
+        params = [child_name]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def get_session(self, session_id):
+        """Full saved-session record, including game_history, or None"""
+        with self.connection() as conn:
+            row = conn.execute("SELECT record FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            events = conn.execute(
+                "SELECT level, item_name, item_type, basket, is_correct, timestamp FROM events "
+                "WHERE session_id = ? ORDER BY seq", (session_id,)).fetchall()
+        record = json.loads(row["record"])
+        record["game_history"] = [{
+            "level": event["level"],
+            "item": {"type": event["item_type"], "name": event["item_name"]},
+            "basket": event["basket"],
+            "is_correct": bool(event["is_correct"]),
+            "timestamp": event["timestamp"]
+        } for event in events]
+        return record
+
+    def accuracy_by_level(self, since=None, until=None):
+        """Attempts, correct placements and accuracy per level for days since..until (inclusive)"""
+        sql = "SELECT level, SUM(attempts) AS attempts, SUM(correct) AS correct FROM level_daily"
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("day >= ?")
+            params.append(_day(since))
+        if until is not None:
+            conditions.append("day <= ?")
+            params.append(_day(until))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " GROUP BY level ORDER BY level"
+        with self.connection() as conn:
+            return {row["level"]: {"attempts": row["attempts"], "correct": row["correct"],
+                                   "accuracy": row["correct"] / row["attempts"] if row["attempts"] else 0.0}
+                    for row in conn.execute(sql, params)}
+
+    def events(self, level=None, since=None, until=None):
+        """Stream game_history events, optionally filtered by level and unix time range"""
+        conditions = []
+        params = []
+        if level is not None:
+            conditions.append("level = ?")
+            params.append(level)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        sql = "SELECT session_id, seq, level, item_name, item_type, basket, is_correct, timestamp FROM events"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self.connection() as conn:
+            for row in conn.execute(sql, params):
+                yield dict(row)
+
+    def count_sessions(self):
+        with self.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+
+class SQLiteSessionWriter(SessionWriter):
+    """SessionWriter that stores each batch in a SQLiteSessionStore"""
+
+    def __init__(self, path=SESSION_DB_PATH, fsync=SESSION_FSYNC, **kwargs):
+        self.store = SQLiteSessionStore(path, fsync=fsync)
+        super().__init__(os.path.dirname(path) or ".", fsync=fsync, **kwargs)
+
+    def _write(self, batch):
+        # With fsync "always" every record is its own durable transaction
+        groups = [[record] for record in batch] if self.fsync == "always" else [batch]
+        written = 0
+        for group in groups:
+            # A bad record only loses its own group, not the rest of the batch
+            try:
+                self.store.add_sessions(group)
+            except (sqlite3.Error, KeyError, TypeError, ValueError) as e:
+                self.stats["errors"] += len(group)
+                self.last_error = str(e)
+                print(f"Error saving {len(group)} sessions: {e}")
+                continue
+            written += len(group)
+        self.stats["written"] += written
+        if written:
+            self.stats["batches"] += 1
+
+    def close(self):
+        super().close()
+        self.store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import saved sessions into the SQLite store")
+    parser.add_argument("--import-from", default=SESSION_DIR, help="Directory of saved session files")
+    parser.add_argument("--db", default=SESSION_DB_PATH, help="Path of the SQLite database")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    started = time.time()
+    store = SQLiteSessionStore(args.db, fsync="batch")
+    added = 0
+    batch = []
+    for record in read_sessions(args.import_from):
+        # Sessions saved before session ids existed get one from their timestamp and name
+        record.setdefault("session_id", f"{record.get('timestamp', '')}|{record.get('child_name', '')}")
+        batch.append(record)
+        if len(batch) >= args.batch_size:
+            added += store.add_sessions(batch)
+            batch = []
+    if batch:
+        added += store.add_sessions(batch)
+    print(f"Imported {added} sessions into {args.db} in {time.time() - started:.1f}s "
+          f"({store.count_sessions()} total)")
+    store.close()
+
+if __name__ == "__main__":
+    main()
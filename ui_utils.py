@@ -1,439 +1,597 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import random
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 
-def load_css():
-    """Load custom CSS styles for the app"""
-    st.markdown("""
-    <style>
-        /* Global Styles */
-        body {
-            font-family: 'Comic Sans MS', cursive, sans-serif;
-            color: #333;
-            background-color: #f9f7f2;
-        }
-        
-        .stApp {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        
-        /* Header Styles */
-        .game-title {
-            color: #FF6B6B;
-            text-align: center;
-            font-size: 3rem;
-            margin-bottom: 1rem;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-        }
-        
-        /* Welcome Page Styles */
-        .welcome-container {
-            text-align: center;
-            padding: 20px;
-            background-color: #fff;
-            border-radius: 15px;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        
-        .welcome-text {
-            color: #4CAF50;
-            font-size: 2.5rem;
-            margin-bottom: 1rem;
-        }
-        
-        .intro-text {
-            font-size: 1.2rem;
-            margin-bottom: 2rem;
-        }
-        
-        .welcome-animation {
-            height: 150px;
-            position: relative;
-            margin-bottom: 20px;
-            overflow: hidden;
-        }
-        
-        .cart-container {
-            position: relative;
-            animation: moveCart 8s infinite linear;
-        }
-        
-        .cart {
-            font-size: 4rem;
-            position: absolute;
-        }
-        
-        .items {
-            position: absolute;
-            top: -10px;
-            left: 10px;
-        }
-        
-        .item {
-            font-size: 2rem;
-            margin-right: 5px;
-            animation: bounce 1s infinite alternate;
-        }
-        
-        @keyframes moveCart {
-            0% { transform: translateX(-100px); }
-            50% { transform: translateX(calc(100% - 100px)); }
-            100% { transform: translateX(-100px); }
-        }
-        
-        @keyframes bounce {
-            from { transform: translateY(0); }
-            to { transform: translateY(-10px); }
-        }
-        
-        /* Instructions Page Styles */
-        .greeting {
-            color: #4CAF50;
-            text-align: center;
-            font-size: 2.5rem;
-            margin-bottom: 1rem;
-        }
-        
-        .instructions-container {
-            background-color: #fff;
-            border-radius: 15px;
-            padding: 20px;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-            text-align: center;
-        }
-        
-        .instruction-step {
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            margin: 15px 0;
-            padding: 10px;
-            background-color: #f8f9fa;
-            border-radius: 10px;
-        }
-        
-        .step-number {
-            font-size: 2rem;
-            margin-right: 15px;
-            color: #FF6B6B;
-        }
-        
-        .step-text {
-            font-size: 1.2rem;
-            flex-grow: 1;
-        }
-        
-        .step-emoji {
-            font-size: 2rem;
-            margin-left: 15px;
-        }
-        
-        .example-container {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            background-color: #fff;
-            border-radius: 15px;
-            padding: 20px;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        
-        .example-item, .example-basket {
-            font-size: 3rem;
-            margin: 10px;
-        }
-        
-        .example-arrow {
-            font-size: 2rem;
-            margin: 10px;
-        }
-        
-        .example-label {
-            font-size: 1.2rem;
-        }
-        
-        /* Game Page Styles */
-        .score-display {
-            font-size: 1.5rem;
-            font-weight: bold;
-            color: #4CAF50;
-            padding: 10px;
-            background-color: #f8f9fa;
-            border-radius: 10px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }
-        
-        .feedback {
-            padding: 10px;
-            border-radius: 10px;
-            margin: 10px 0;
-            text-align: center;
-            font-size: 1.2rem;
-            font-weight: bold;
-        }
-        
-        .feedback-positive {
-            background-color: #d4edda;
-            color: #155724;
-            border: 1px solid #c3e6cb;
-        }
-        
-        .feedback-negative {
-            background-color: #f8d7da;
-            color: #721c24;
-            border: 1px solid #f5c6cb;
-        }
-        
-        .game-container {
-            background-color: #fff;
-            border-radius: 15px;
-            padding: 20px;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        
-        .store-section, .baskets-section {
-            margin-bottom: 20px;
-        }
-        
-        .item-card {
-            background-color: #f8f9fa;
-            border-radius: 10px;
-            padding: 15px;
-            text-align: center;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            margin: 10px 0;
-            transition: transform 0.2s;
-        }
-        
-        .item-card:hover {
-            transform: scale(1.05);
-        }
-        
-        .item-emoji {
-            font-size: 3rem;
-            margin-bottom: 10px;
-        }
-        
-        .item-name {
-            font-size: 1.1rem;
-            font-weight: bold;
-        }
-        
-        .basket {
-            background-color: #f8f9fa;
-            border-radius: 10px;
-            padding: 15px;
-            text-align: center;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            margin: 10px 0;
-            transition: transform 0.2s;
-        }
-        
-        .basket:hover {
-            transform: scale(1.05);
-        }
-        
-        .basket-emoji {
-            font-size: 3rem;
-            margin-bottom: 10px;
-        }
-        
-        .basket-label {
-            font-size: 1.1rem;
-            font-weight: bold;
-        }
-        
-        .selected-item-container {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            margin: 20px 0;
-            padding: 15px;
-            background-color: #e8f5e9;
-            border-radius: 10px;
-        }
-        
-        .selected-item-emoji {
-            font-size: 3rem;
-            margin-bottom: 10px;
-        }
-        
-        .selected-item-prompt {
-            font-size: 1.3rem;
-            font-weight: bold;
-            color: #4CAF50;
-        }
-        
-        .learning-tip {
-            background-color: #e0f7fa;
-            color: #01579b;
-            padding: 15px;
-            border-radius: 10px;
-            margin: 20px 0;
-            font-size: 1.1rem;
-            text-align: center;
-            border-left: 5px solid #4fc3f7;
-        }
-        
-        /* Results Page Styles */
-        .results-title {
-            color: #4CAF50;
-            text-align: center;
-            font-size: 2.5rem;
-            margin-bottom: 1rem;
-        }
-        
-        .results-animation {
-            height: 150px;
-            position: relative;
-            margin: 30px 0;
-            text-align: center;
-        }
-        
-        .cart-full {
-            font-size: 4rem;
-            position: relative;
-            display: inline-block;
-            animation: cartBounce 2s infinite alternate;
-        }
-        
-        .cart-items {
-            position: absolute;
-            top: -20px;
-            left: 10px;
-            display: flex;
-        }
-        
-        .cart-items span {
-            font-size: 1.5rem;
-            margin-right: 5px;
-            animation: itemFloat 3s infinite alternate;
-            animation-delay: calc(var(--i) * 0.5s);
-        }
-        
-        @keyframes cartBounce {
-            from { transform: translateY(0); }
-            to { transform: translateY(-10px); }
-        }
-        
-        @keyframes itemFloat {
-            from { transform: translateY(0) rotate(0deg); }
-            to { transform: translateY(-15px) rotate(10deg); }
-        }
-        
-        .final-score {
-            font-size: 2rem;
-            font-weight: bold;
-            color: #4CAF50;
-            text-align: center;
-            margin: 20px 0;
-            padding: 15px;
-            background-color: #f8f9fa;
-            border-radius: 10px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }
-        
-        .achievements-card {
-            background-color: #fff;
-            border-radius: 10px;
-            padding: 20px;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        
-        .achievements-card h3 {
-            color: #FF6B6B;
-            margin-bottom: 15px;
-        }
-        
-        .achievements-card ul {
-            list-style-type: none;
-            padding-left: 10px;
-        }
-        
-        .achievements-card li {
-            margin: 10px 0;
-            font-size: 1.1rem;
-        }
-        
-        .badge {
-            display: flex;
-            align-items: center;
-            background-color: #fff;
-            border-radius: 10px;
-            padding: 15px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            margin: 15px 0;
-        }
-        
-        .badge-emoji {
-            font-size: 2.5rem;
-            margin-right: 15px;
-        }
-        
-        .badge-info {
-            flex-grow: 1;
-        }
-        
-        .badge-name {
-            font-size: 1.2rem;
-            font-weight: bold;
-            color: #4CAF50;
-            margin-bottom: 5px;
-        }
-        
-        .badge-description {
-            font-size: 1rem;
-            color: #666;
-        }
-        
-        .learning-summary {
-            background-color: #fff3e0;
-            color: #e65100;
-            padding: 20px;
-            border-radius: 10px;
-            margin: 20px 0;
-            font-size: 1.2rem;
-            text-align: center;
-            border-left: 5px solid #ff9800;
-        }
-        
-        /* Buttons */
-        .stButton button {
-            background-color: #4CAF50;
-            color: white;
-            font-weight: bold;
-            border-radius: 20px;
-            padding: 10px 20px;
-            border: none;
-            transition: all 0.3s;
-        }
-        
-        .stButton button:hover {
-            background-color: #45a049;
-            transform: scale(1.05);
-        }
-        
-        /* Avatar display */
-        .avatar-container {
-            width: 80px;
-            height: 80px;
-            border-radius: 50%;
-            overflow: hidden;
-            border: 3px solid #4CAF50;
-            background-color: #e8f5e9;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 2.5rem;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-        }
-    </style>
-    """, unsafe_allow_html=True)
+from asset_utils import ASSET_DIR, asset_version, write_asset, image_variants
+
+# How the game page draws the store and baskets: "html" renders each section as
+# one HTML block with a single picker widget, "columns" uses a column and a
+# button per card, "component" sorts in the browser and syncs moves in batches
+STORE_RENDER_MODE = os.environ.get("STORE_RENDER_MODE", "columns")
+SORT_BOARD_BATCH_SIZE = 5      # Moves the sort board collects before syncing
+
+# Fragments rerun on their own when a widget inside them changes. They need
+# Streamlit 1.33+ (st.experimental_fragment) or 1.37+ (st.fragment); on older
+# versions the decorator does nothing and every interaction reruns the app.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+FRAGMENT_RERUN_SUPPORTED = hasattr(st, "fragment")
+
+def rerun(scope="app"):
+    """Rerun the whole app, or with scope="fragment" only the running fragment where supported"""
+    if scope == "fragment" and FRAGMENT_RERUN_SUPPORTED:
+        st.rerun(scope="fragment")
+    elif hasattr(st, "rerun"):
+        st.rerun()
+    else:
+        st.experimental_rerun()
+
+@contextmanager
+def timed_section(name, started=None):
+    """Add the time spent in a block (or since `started`) to the session's rerun timings"""
+    if started is None:
+        started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = st.session_state.setdefault("rerun_timings", {})
+        stats = timings.setdefault(name, {"count": 0, "total": 0.0, "last": 0.0})
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["last"] = elapsed
+
+# Stylesheets and images are served as static assets through the component
+# file route, which sends them with the right content type and lets browsers
+# cache them, so a rerun only sends a short @import or <img> tag. "inline"
+# ships the minified CSS (or image bytes through st.image) instead.
+CSS_DELIVERY = os.environ.get("CSS_DELIVERY", "link")      # "link" or "inline"
+IMAGE_DELIVERY = os.environ.get("IMAGE_DELIVERY", "link")  # "link" or "inline"
+try:
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    _assets = components.declare_component("assets", path=ASSET_DIR)
+except OSError as e:
+    # e.g. a read-only deploy: the app still runs, with everything inlined
+    print(f"Error creating the asset folder, inlining stylesheets and images instead: {e}")
+    _assets = None
+    CSS_DELIVERY = IMAGE_DELIVERY = "inline"
+
+_sort_board = components.declare_component(
+    "sort_board",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "sort_board")
+)
+
+# Stylesheets by page. "base" is shipped on every page; each page adds its own rules.
+PAGE_CSS = {
+    "base": """
+    /* Global Styles */
+    body {
+        font-family: 'Comic Sans MS', cursive, sans-serif;
+        color: #333;
+        background-color: #f9f7f2;
+    }
+    
+    .stApp {
+        max-width: 1200px;
+        margin: 0 auto;
+    }
+    
+    /* Header Styles */
+    .game-title {
+        color: #FF6B6B;
+        text-align: center;
+        font-size: 3rem;
+        margin-bottom: 1rem;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
+    }
+    
+    /* Buttons */
+    .stButton button {
+        background-color: #4CAF50;
+        color: white;
+        font-weight: bold;
+        border-radius: 20px;
+        padding: 10px 20px;
+        border: none;
+        transition: all 0.3s;
+    }
+    
+    .stButton button:hover {
+        background-color: #45a049;
+        transform: scale(1.05);
+    }
+    
+    /* Avatar display */
+    .avatar-container {
+        width: 80px;
+        height: 80px;
+        border-radius: 50%;
+        overflow: hidden;
+        border: 3px solid #4CAF50;
+        background-color: #e8f5e9;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-size: 2.5rem;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+    }
+    """,
+    "welcome": """
+    /* Welcome Page Styles */
+    .welcome-container {
+        text-align: center;
+        padding: 20px;
+        background-color: #fff;
+        border-radius: 15px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        margin-bottom: 20px;
+    }
+    
+    .welcome-text {
+        color: #4CAF50;
+        font-size: 2.5rem;
+        margin-bottom: 1rem;
+    }
+    
+    .intro-text {
+        font-size: 1.2rem;
+        margin-bottom: 2rem;
+    }
+    
+    .welcome-animation {
+        height: 150px;
+        position: relative;
+        margin-bottom: 20px;
+        overflow: hidden;
+    }
+    
+    .cart-container {
+        position: relative;
+        animation: moveCart 8s infinite linear;
+    }
+    
+    .cart {
+        font-size: 4rem;
+        position: absolute;
+    }
+    
+    .items {
+        position: absolute;
+        top: -10px;
+        left: 10px;
+    }
+    
+    .item {
+        font-size: 2rem;
+        margin-right: 5px;
+        animation: bounce 1s infinite alternate;
+    }
+    
+    @keyframes moveCart {
+        0% { transform: translateX(-100px); }
+        50% { transform: translateX(calc(100% - 100px)); }
+        100% { transform: translateX(-100px); }
+    }
+    
+    @keyframes bounce {
+        from { transform: translateY(0); }
+        to { transform: translateY(-10px); }
+    }
+    """,
+    "instructions": """
+    /* Instructions Page Styles */
+    .greeting {
+        color: #4CAF50;
+        text-align: center;
+        font-size: 2.5rem;
+        margin-bottom: 1rem;
+    }
+    
+    .instructions-container {
+        background-color: #fff;
+        border-radius: 15px;
+        padding: 20px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        margin-bottom: 20px;
+        text-align: center;
+    }
+    
+    .instruction-step {
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        margin: 15px 0;
+        padding: 10px;
+        background-color: #f8f9fa;
+        border-radius: 10px;
+    }
+    
+    .step-number {
+        font-size: 2rem;
+        margin-right: 15px;
+        color: #FF6B6B;
+    }
+    
+    .step-text {
+        font-size: 1.2rem;
+        flex-grow: 1;
+    }
+    
+    .step-emoji {
+        font-size: 2rem;
+        margin-left: 15px;
+    }
+    
+    .example-container {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        background-color: #fff;
+        border-radius: 15px;
+        padding: 20px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        margin-bottom: 20px;
+    }
+    
+    .example-item, .example-basket {
+        font-size: 3rem;
+        margin: 10px;
+    }
+    
+    .example-arrow {
+        font-size: 2rem;
+        margin: 10px;
+    }
+    
+    .example-label {
+        font-size: 1.2rem;
+    }
+    """,
+    "game": """
+    /* Game Page Styles */
+    .score-display {
+        font-size: 1.5rem;
+        font-weight: bold;
+        color: #4CAF50;
+        padding: 10px;
+        background-color: #f8f9fa;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    
+    .feedback {
+        padding: 10px;
+        border-radius: 10px;
+        margin: 10px 0;
+        text-align: center;
+        font-size: 1.2rem;
+        font-weight: bold;
+    }
+    
+    .feedback-positive {
+        background-color: #d4edda;
+        color: #155724;
+        border: 1px solid #c3e6cb;
+    }
+    
+    .feedback-negative {
+        background-color: #f8d7da;
+        color: #721c24;
+        border: 1px solid #f5c6cb;
+    }
+    
+    .game-container {
+        background-color: #fff;
+        border-radius: 15px;
+        padding: 20px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        margin-bottom: 20px;
+    }
+    
+    .store-section, .baskets-section {
+        margin-bottom: 20px;
+    }
+    
+    .item-card {
+        background-color: #f8f9fa;
+        border-radius: 10px;
+        padding: 15px;
+        text-align: center;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        margin: 10px 0;
+        transition: transform 0.2s;
+    }
+    
+    .item-card:hover {
+        transform: scale(1.05);
+    }
+    
+    .item-emoji {
+        font-size: 3rem;
+        margin-bottom: 10px;
+    }
+    
+    .item-name {
+        font-size: 1.1rem;
+        font-weight: bold;
+    }
+    
+    .basket {
+        background-color: #f8f9fa;
+        border-radius: 10px;
+        padding: 15px;
+        text-align: center;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        margin: 10px 0;
+        transition: transform 0.2s;
+    }
+    
+    .basket:hover {
+        transform: scale(1.05);
+    }
+    
+    .basket-emoji {
+        font-size: 3rem;
+        margin-bottom: 10px;
+    }
+    
+    .basket-label {
+        font-size: 1.1rem;
+        font-weight: bold;
+    }
+    
+    .store-grid {
+        display: grid;
+        grid-template-columns: repeat(4, 1fr);
+        gap: 10px;
+    }
+    
+    .basket-grid {
+        display: grid;
+        grid-template-columns: repeat(auto-fit, minmax(120px, 1fr));
+        gap: 10px;
+    }
+    
+    .selected-item-container {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        margin: 20px 0;
+        padding: 15px;
+        background-color: #e8f5e9;
+        border-radius: 10px;
+    }
+    
+    .selected-item-emoji {
+        font-size: 3rem;
+        margin-bottom: 10px;
+    }
+    
+    .selected-item-prompt {
+        font-size: 1.3rem;
+        font-weight: bold;
+        color: #4CAF50;
+    }
+    
+    .learning-tip {
+        background-color: #e0f7fa;
+        color: #01579b;
+        padding: 15px;
+        border-radius: 10px;
+        margin: 20px 0;
+        font-size: 1.1rem;
+        text-align: center;
+        border-left: 5px solid #4fc3f7;
+    }
+    
+    /* Level complete celebration */
+    @keyframes pulse {
+        0% { transform: scale(1); }
+        50% { transform: scale(1.1); }
+        100% { transform: scale(1); }
+    }
+    """,
+    "results": """
+    /* Results Page Styles */
+    .results-title {
+        color: #4CAF50;
+        text-align: center;
+        font-size: 2.5rem;
+        margin-bottom: 1rem;
+    }
+    
+    .results-animation {
+        height: 150px;
+        position: relative;
+        margin: 30px 0;
+        text-align: center;
+    }
+    
+    .cart-full {
+        font-size: 4rem;
+        position: relative;
+        display: inline-block;
+        animation: cartBounce 2s infinite alternate;
+    }
+    
+    .cart-items {
+        position: absolute;
+        top: -20px;
+        left: 10px;
+        display: flex;
+    }
+    
+    .cart-items span {
+        font-size: 1.5rem;
+        margin-right: 5px;
+        animation: itemFloat 3s infinite alternate;
+        animation-delay: calc(var(--i) * 0.5s);
+    }
+    
+    @keyframes cartBounce {
+        from { transform: translateY(0); }
+        to { transform: translateY(-10px); }
+    }
+    
+    @keyframes itemFloat {
+        from { transform: translateY(0) rotate(0deg); }
+        to { transform: translateY(-15px) rotate(10deg); }
+    }
+    
+    .final-score {
+        font-size: 2rem;
+        font-weight: bold;
+        color: #4CAF50;
+        text-align: center;
+        margin: 20px 0;
+        padding: 15px;
+        background-color: #f8f9fa;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    
+    .achievements-card {
+        background-color: #fff;
+        border-radius: 10px;
+        padding: 20px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        margin-bottom: 20px;
+    }
+    
+    .achievements-card h3 {
+        color: #FF6B6B;
+        margin-bottom: 15px;
+    }
+    
+    .achievements-card ul {
+        list-style-type: none;
+        padding-left: 10px;
+    }
+    
+    .achievements-card li {
+        margin: 10px 0;
+        font-size: 1.1rem;
+    }
+    
+    .badge {
+        display: flex;
+        align-items: center;
+        background-color: #fff;
+        border-radius: 10px;
+        padding: 15px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        margin: 15px 0;
+    }
+    
+    .badge-emoji {
+        font-size: 2.5rem;
+        margin-right: 15px;
+    }
+    
+    .badge-info {
+        flex-grow: 1;
+    }
+    
+    .badge-name {
+        font-size: 1.2rem;
+        font-weight: bold;
+        color: #4CAF50;
+        margin-bottom: 5px;
+    }
+    
+    .badge-description {
+        font-size: 1rem;
+        color: #666;
+    }
+    
+    .learning-summary {
+        background-color: #fff3e0;
+        color: #e65100;
+        padding: 20px;
+        border-radius: 10px;
+        margin: 20px 0;
+        font-size: 1.2rem;
+        text-align: center;
+        border-left: 5px solid #ff9800;
+    }
+    """
+}
+
+def minify_css(css):
+    """Strip comments and unneeded whitespace from a stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+@lru_cache(maxsize=None)
+def minified_css(name):
+    """Minified stylesheet for a PAGE_CSS entry, built once per process"""
+    return minify_css(PAGE_CSS[name])
+
+def asset_url(filename, data):
+    """URL of a file in the asset folder, versioned by content so browsers cache it"""
+    return f"component/{_assets.name}/{filename}?v={asset_version(data)}"
+
+@lru_cache(maxsize=None)
+def stylesheet_url(name):
+    """
+    Write a minified stylesheet to the asset folder once per process and
+    return its URL.
+    """
+    css = minified_css(name).encode("utf-8")
+    write_asset(f"{name}.css", css)
+    return asset_url(f"{name}.css", css)
+
+def load_css(page=None):
+    """Load the base styles and the styles for the current page"""
+    names = ["base"] + ([page] if page in PAGE_CSS and page != "base" else [])
+    if CSS_DELIVERY == "link":
+        try:
+            imports = "".join(f"@import url('{stylesheet_url(name)}');" for name in names)
+            st.markdown(f"<style>{imports}</style>", unsafe_allow_html=True)
+            return
+        except OSError as e:
+            print(f"Error writing stylesheets, inlining them instead: {e}")
+    st.markdown(f"<style>{''.join(minified_css(name) for name in names)}</style>", unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def cached_image(path, width, mtime):
+    """
+    Image variants for `path` shown `width` px wide, built (or read from the
+    asset folder) once per process and shared by every session. `mtime`
+    rebuilds them when the source file changes.
+    """
+    variants = image_variants(path, width)
+    webp = sorted((w, filename, data) for (fmt, w), (filename, data) in variants.items() if fmt == "webp")
+    html = None
+    if _assets is not None and all(os.path.exists(os.path.join(ASSET_DIR, filename))
+                                   for filename, _ in variants.values()):
+        # The browser downloads the smallest WebP that covers `width` CSS pixels
+        # at its screen density, or the 1x PNG if it has no WebP support
+        srcset = ", ".join(f"{asset_url(filename, data)} {w}w" for w, filename, data in webp)
+        png_url = next(asset_url(*value) for (fmt, _), value in variants.items() if fmt == "png")
+        html = (f"<picture><source type='image/webp' srcset='{srcset}' sizes='{width}px'>"
+                f"<img src='{png_url}' width='{width}' alt='' style='max-width:100%;height:auto'></picture>")
+    return {"html": html, "fallback": webp[0][2]}
+
+def show_image(path, width):
+    """Show a local image `width` px wide from its right-sized variants"""
+    try:
+        image = cached_image(path, width, os.path.getmtime(path))
+    except OSError as e:
+        print(f"Error building image variants for {path}: {e}")
+        st.image(path, width=width)
+        return
+    if IMAGE_DELIVERY == "link" and image["html"]:
+        st.markdown(image["html"], unsafe_allow_html=True)
+    else:
+        # st.image re-encodes non-JPEG bytes, but the 1x variant is already small
+        st.image(image["fallback"], width=width)
 
 def show_celebration():
     """Display a celebration animation"""
@@ -468,4 +626,37 @@ def display_avatar():
     <div class="avatar-container">
         {st.session_state.avatar}
     </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+
+@lru_cache(maxsize=None)
+def item_card_html(emoji, name):
+    """HTML for one store item card"""
+    return f"<div class='item-card'><div class='item-emoji'>{emoji}</div><div class='item-name'>{name}</div></div>"
+
+@lru_cache(maxsize=None)
+def basket_card_html(emoji, label):
+    """HTML for one basket card"""
+    return f"<div class='basket'><div class='basket-emoji'>{emoji}</div><div class='basket-label'>{label}</div></div>"
+
+def card_grid_html(cards, css_class):
+    """Wrap prebuilt card HTML in a grid container, so a section is a single element"""
+    return f"<div class='{css_class}'>{''.join(cards)}</div>"
+
+def sort_board(items, baskets, categories, token, selected=None, batch_size=SORT_BOARD_BATCH_SIZE, key=None):
+    """
+    Browser-side sorting board. The child picks and places items without a
+    rerun, seeing each item's "fact" (if any) when it is picked; moves are checked instantly against `categories` (item id ->
+    basket id) and returned as {"token", "moves", "finish"} once batch_size
+    moves are made, the store is empty, the page is hidden or the child
+    presses the board's Finish button. Returns None until then.
+    """
+    return _sort_board(
+        items=items,
+        baskets=baskets,
+        categories=categories,
+        token=token,
+        selected=selected,
+        batch_size=batch_size,
+        key=key,
+        default=None
+    )